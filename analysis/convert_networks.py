@@ -0,0 +1,32 @@
+"""Converts all raw networks to columnar caches
+
+Parsing the netCDF networks is the slowest part of extracting results. This
+only has to be run once, after which extract_results.py can be run with
+--columnar to read the memory mapped caches instead.
+"""
+
+from pypsadr.columnar import convert_network, is_columnar
+from extract_results import get_jobs, get_cache_dir
+import argparse
+
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Overwrite existing caches",
+    )
+    args = parser.parse_args()
+
+    for network, _ in get_jobs():
+        cache_dir = get_cache_dir(network)
+        if is_columnar(cache_dir) and not args.force:
+            logging.info(f"Skipping {network} as {cache_dir} exists")
+            continue
+        convert_network(network, cache_dir)
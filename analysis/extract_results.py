@@ -1,21 +1,40 @@
 """Extracts relevent results from all model runs
 
-Summarizes the key results from all networks.
+Summarizes the key results from all networks into a single partitioned
+results store (see pypsadr.store), queried by analysis/utils.py.
 This data is then used in visualizations.
 Code is quite ugly as all the path handeling, but is what it is.
 """
 
-from pypsadr import ResultsAccessor
-import pypsa
-import matplotlib.pyplot as plt
+from __future__ import annotations
+
+from pypsadr import ResultsAccessor, NetworkData, load_network
+from pypsadr.manifest import add_result, get_stale_results, start_manifest
+from pypsadr.columnar import is_columnar
+from pypsadr.store import get_stored_results, write_results
+from pypsadr import instrument
+import matplotlib
 from pathlib import Path
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from contextlib import AbstractContextManager, nullcontext
+import argparse
+import queue
 import shutil
+import threading
+import traceback
+from typing import Any, Callable, Iterator, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pypsa
+    import matplotlib.pyplot as plt
 
 import logging
 
 logging.basicConfig(level=logging.INFO)
 
 DATA_DIR = "./data"
+RESULTS_DIR = Path(DATA_DIR, "results")
 
 REGIONS = ["caiso", "new_england", "caiso_cc"]
 SCENARIOS = ["static", "dynamic"]
@@ -23,43 +42,97 @@ BASELINES = ["lgas", "mgas", "hgas"]
 # BASELINES = ["er0", "er5", "er10"]
 
 
-def save_results(n: pypsa.Network, save_dir: Path | str) -> None:
-    """Saves results to a directory"""
+def save_results(
+    n: pypsa.Network | NetworkData,
+    save_dir: Path | str,
+    results: Optional[list[str]] = None,
+    on_saved: Optional[Callable[[str], None]] = None,
+    plot: bool = True,
+    dpi: int = 400,
+    fmt: str = "png",
+) -> None:
+    """Saves results of the run in save_dir to the results store
+
+    Only the given results are (re)written; others already stored for the run
+    are kept. Each result is written as soon as it is extracted, and on_saved
+    is called with it once written, so an interrupted run keeps the results
+    done so far. Plots are written to save_dir, and skipped if plot is False,
+    see save_plots to render them later.
+    """
     if isinstance(save_dir, str):
         save_dir = Path(save_dir)
 
-    # create root scenario folder
-    save_dir.mkdir(parents=True, exist_ok=True)
-    if save_dir.exists():
-        shutil.rmtree(save_dir)
-    save_dir.mkdir(parents=True)
+    keys, name = get_result_keys(save_dir)
+
+    logging.info(f"Saving results of {name} to {RESULTS_DIR}")
+
+    plot_path = Path(save_dir, "plot")
+    if plot:
+        plot_path.mkdir(parents=True, exist_ok=True)
+
+    ra = ResultsAccessor(n)
+
+    results = results or list(ra)
+
+    def save_plot(result: str, fig: plt.figure) -> None:
+        _write_plot(fig, result, plot_path, dpi, fmt)
+
+    def save(result: str, dp: pd.DataFrame, df: pd.DataFrame) -> None:
+        datapoints = {result: dp[["metric", "value"]].infer_objects()}
+        with instrument.measure(result, "write"):
+            write_results(RESULTS_DIR, keys, name, datapoints, {result: df})
+        if on_saved:
+            on_saved(result)
 
-    logging.info(f"Saving results to {save_dir}")
+    # each extractor is built once for its datapoint, dataframe and plot
+    ra.extract_all(results, plot=save_plot if plot else None, on_extracted=save)
 
-    # directories for individual results
-    datapoint_path = Path(save_dir, "datapoint")
-    dataframe_path = Path(save_dir, "dataframe")
+
+def save_plots(
+    n: pypsa.Network | NetworkData,
+    save_dir: Path | str,
+    results: Optional[list[str]] = None,
+    on_saved: Optional[Callable[[str], None]] = None,
+    dpi: int = 400,
+    fmt: str = "png",
+) -> None:
+    """Saves plots of results to a directory"""
     plot_path = Path(save_dir, "plot")
+    plot_path.mkdir(parents=True, exist_ok=True)
 
-    datapoint_path.mkdir(parents=True)
-    dataframe_path.mkdir(parents=True)
-    plot_path.mkdir(parents=True)
+    logging.info(f"Saving plots to {plot_path}")
 
     ra = ResultsAccessor(n)
 
-    for result in ra:
-        dp = ra.get_datapoint(result, as_df=True)
-        df = ra.get_dataframe(result)
-        fig, _ = ra.plot(result)
+    for result in results or list(ra):
+        _save_plot(ra, result, plot_path, dpi, fmt)
 
-        dp.to_csv(Path(datapoint_path, f"{result}.csv"), index=False)
-        df.to_csv(Path(dataframe_path, f"{result}.csv"), index=True)
-        fig.savefig(Path(plot_path, f"{result}.png"), dpi=400, bbox_inches="tight")
+        if on_saved:
+            on_saved(result)
 
-        plt.close()
 
+def _save_plot(
+    ra: ResultsAccessor, result: str, plot_path: Path, dpi: int, fmt: str
+) -> None:
+    fig, _ = ra.plot(result)
+    _write_plot(fig, result, plot_path, dpi, fmt)
+
+
+def _write_plot(
+    fig: plt.figure, result: str, plot_path: Path, dpi: int, fmt: str
+) -> None:
+    import matplotlib.pyplot as plt
+
+    with instrument.measure(result, "savefig"):
+        fig.savefig(Path(plot_path, f"{result}.{fmt}"), dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+
+
+def get_jobs() -> list[tuple[Path, Path]]:
+    """Gets (network, save_dir) for every network to process"""
+
+    jobs = []
 
-if __name__ == "__main__":
     # Process baseline data without DR
     for region in REGIONS:
         for baseline in BASELINES:
@@ -70,8 +143,7 @@ if __name__ == "__main__":
             assert num_networks == 1, f"{num_networks} networks in {network_dir}"
             # save results
             for network in network_dir.iterdir():
-                n = pypsa.Network(str(network))
-                save_results(n, save_dir)
+                jobs.append((network, save_dir))
 
     # Process DR data
     for region in REGIONS:
@@ -88,8 +160,7 @@ if __name__ == "__main__":
                 assert num_networks == 1, f"{num_networks} networks in {network_dir}"
                 # save results
                 for network in network_dir.iterdir():
-                    n = pypsa.Network(str(network))
-                    save_results(n, save_dir)
+                    jobs.append((network, save_dir))
 
     # Process sensitivity analysis data
     for region in REGIONS:
@@ -97,12 +168,9 @@ if __name__ == "__main__":
         baseline_dir = Path(DATA_DIR, region, "sensitivity_analysis", "raw", "no_dr")
         network_dir = Path(baseline_dir, "networks")
         save_dir = Path(DATA_DIR, region, "sensitivity_analysis", "processed", "no_dr")
-        # check only one network file
-        num_networks = sum(1 for item in network_dir.iterdir() if item.is_file())
         # save results
         for network in network_dir.iterdir():
-            n = pypsa.Network(str(network))
-            save_results(n, save_dir)
+            jobs.append((network, save_dir))
 
         # process sensitivity analysis
         for scenario in SCENARIOS:
@@ -120,11 +188,417 @@ if __name__ == "__main__":
                     scenario,
                     run_name,
                 )
-                # check only one network file
-                num_networks = sum(
-                    1 for item in network_dir.iterdir() if item.is_file()
-                )
                 # save results
                 for network in network_dir.iterdir():
-                    n = pypsa.Network(str(network))
-                    save_results(n, save_dir)
+                    jobs.append((network, save_dir))
+
+    return jobs
+
+
+def get_result_keys(save_dir: Path) -> tuple[dict[str, Optional[str]], str]:
+    """Gets the store keys and part name of the run written to save_dir
+
+    Keys are region, study, scenario, method, sector and dr_price. Keys that
+    do not apply to a run (ie. sector of a baseline run) are None.
+    """
+
+    parts = Path(save_dir).relative_to(DATA_DIR).parts
+    region = parts[0]
+    if parts[1] == "sensitivity_analysis":
+        study = "sensitivity_analysis"
+        run = parts[3:]
+    else:
+        study = "main"
+        run = parts[2:]
+
+    keys = {
+        "region": region,
+        "study": study,
+        "scenario": run[-1],
+        "method": None,
+        "sector": None,
+        "dr_price": None,
+    }
+
+    if len(run) > 1:
+        keys["method"] = run[0]
+        # DR run names are "<sector>-<dr_price>-<scenario>"
+        names = run[-1].split("-", 2)
+        if len(names) == 3:
+            keys["sector"], keys["dr_price"], keys["scenario"] = names
+
+    name = "__".join(parts[1:])
+    return keys, name
+
+
+def get_cache_dir(network: Path) -> Path:
+    """Gets the columnar cache of a network, beside its networks directory"""
+    return Path(network.parent.parent, "columnar", network.stem)
+
+
+def _get_source(network: Path, columnar: bool) -> Path:
+    if columnar and is_columnar(get_cache_dir(network)):
+        return get_cache_dir(network)
+    return network
+
+
+def _load_network(
+    network: Path,
+    columnar: bool,
+    results: list[str],
+    reduced_precision: bool,
+    lazy: bool,
+):
+    source = _get_source(network, columnar)
+    dtype = "float32" if reduced_precision else None
+    with instrument.measure(None, "load", source=str(source)):
+        return load_network(source, results, dtype, lazy)
+
+
+def _get_stale(
+    network: Path, save_dir: Path, force: bool, kind: str = "results"
+) -> list[str]:
+    """Gets results (or plots) of a job that are missing or stale
+
+    Results the manifest records, but that are missing from the results store
+    (ie. it was moved or cleared), are stale too.
+    """
+    results = ResultsAccessor.available_results
+    if force:
+        return results
+    stale = get_stale_results(save_dir, network, results, kind)
+    if kind == "results" and len(stale) < len(results):
+        keys, name = get_result_keys(save_dir)
+        stored = get_stored_results(RESULTS_DIR, keys, name)
+        stale = [x for x in results if x in stale or x not in stored]
+    return stale
+
+
+def _read_job(
+    network: Path,
+    save_dir: Path,
+    force: bool = False,
+    columnar: bool = False,
+    reduced_precision: bool = False,
+    lazy: bool = False,
+    kind: str = "results",
+    **kwargs,
+) -> tuple[list[str], Any]:
+    """Gets the stale results of a job, and reads its network if any are
+
+    Not measured, as it runs alongside other jobs. Other job kwargs are
+    ignored.
+    """
+    stale = _get_stale(network, save_dir, force, kind)
+    if not stale:
+        return stale, None
+    source = _get_source(network, columnar)
+    dtype = "float32" if reduced_precision else None
+    return stale, load_network(source, stale, dtype, lazy)
+
+
+def _wait(
+    prefetched: Future, profile: Optional[str], save_dir: Path
+) -> tuple[list[str], Any]:
+    """Waits for a prefetched job, measured as its load phase"""
+    with _profiling(profile, save_dir):
+        with instrument.measure(None, "load", prefetched=True):
+            return prefetched.result()
+
+
+def _prefetch(
+    jobs: list[tuple[Path, Path]],
+    read: Callable[[Path, Path], tuple[list[str], Any]],
+    depth: int,
+) -> Iterator[tuple[Path, Path, Future]]:
+    """Reads networks of the jobs ahead in a background thread
+
+    Yields each job with a future of its read, queued as the read starts so
+    time spent waiting on it can be measured. At most depth reads wait in the
+    queue, plus the one in progress, which caps networks in memory. Read
+    errors are raised by the future, failing only that job.
+    """
+
+    pending = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def produce() -> None:
+        for network, save_dir in jobs:
+            future = Future()
+            pending.put((network, save_dir, future))
+            if stop.is_set():
+                return
+            try:
+                future.set_result(read(network, save_dir))
+            except Exception as ex:
+                future.set_exception(ex)
+        pending.put(None)
+
+    thread = threading.Thread(target=produce, name="prefetch", daemon=True)
+    thread.start()
+    try:
+        while (item := pending.get()) is not None:
+            yield item
+    finally:
+        # unblock the reader if stopped early
+        stop.set()
+        while thread.is_alive():
+            try:
+                pending.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def _profiling(profile: Optional[str], save_dir: Path) -> AbstractContextManager:
+    """Records timings of the job to the profile, if any, tagged with the run"""
+    if not profile:
+        return nullcontext()
+    _, name = get_result_keys(save_dir)
+    return instrument.recording(instrument.JsonLinesSink(profile, run=name))
+
+
+def run_job(
+    network: Path,
+    save_dir: Path,
+    force: bool = False,
+    columnar: bool = False,
+    plots: str = "inline",
+    dpi: int = 400,
+    fmt: str = "png",
+    profile: Optional[str] = None,
+    reduced_precision: bool = False,
+    lazy: bool = False,
+    prefetched: Optional[Future] = None,
+) -> Path:
+    """Loads a network and saves any results that are missing or stale
+
+    If columnar, the network is read from its columnar cache when one exists.
+    Plots are only rendered here if plots is "inline". If profile is given,
+    timings of each phase are appended to it as JSON lines. If
+    reduced_precision, time series are held in float32. If lazy, netCDF time
+    series are left on disk and reduced a chunk at a time. If prefetched, the
+    stale results and network are taken from it (see run_jobs).
+    """
+
+    results = ResultsAccessor.available_results
+    if prefetched is None:
+        stale = _get_stale(network, save_dir, force)
+    else:
+        stale, n = _wait(prefetched, profile, save_dir)
+
+    if not stale:
+        logging.info(f"Skipping {save_dir} as it is up to date")
+        return save_dir
+
+    if len(stale) == len(results):
+        # nothing to reuse, so start from a clean directory
+        if save_dir.exists():
+            shutil.rmtree(save_dir)
+        save_dir.mkdir(parents=True)
+        start_manifest(save_dir, network)
+
+    def on_saved(result: str) -> None:
+        add_result(save_dir, result)
+        if plots == "inline":
+            add_result(save_dir, result, "plots")
+
+    with _profiling(profile, save_dir):
+        if prefetched is None:
+            n = _load_network(network, columnar, stale, reduced_precision, lazy)
+        save_results(
+            n, save_dir, stale, on_saved, plot=(plots == "inline"), dpi=dpi, fmt=fmt
+        )
+    return save_dir
+
+
+def render_job(
+    network: Path,
+    save_dir: Path,
+    force: bool = False,
+    columnar: bool = False,
+    dpi: int = 400,
+    fmt: str = "png",
+    profile: Optional[str] = None,
+    reduced_precision: bool = False,
+    lazy: bool = False,
+    prefetched: Optional[Future] = None,
+) -> Path:
+    """Loads a network and saves plots that are missing or stale"""
+
+    if prefetched is None:
+        stale = _get_stale(network, save_dir, force, "plots")
+    else:
+        stale, n = _wait(prefetched, profile, save_dir)
+
+    if not stale:
+        logging.info(f"Skipping plots of {save_dir} as they are up to date")
+        return save_dir
+
+    with _profiling(profile, save_dir):
+        if prefetched is None:
+            n = _load_network(network, columnar, stale, reduced_precision, lazy)
+        save_plots(
+            n,
+            save_dir,
+            stale,
+            on_saved=lambda x: add_result(save_dir, x, "plots"),
+            dpi=dpi,
+            fmt=fmt,
+        )
+    return save_dir
+
+
+def _init_worker() -> None:
+    # workers only write figures to file
+    matplotlib.use("Agg")
+
+
+def run_jobs(
+    jobs: list[tuple[Path, Path]],
+    workers: int = 1,
+    func: Callable[..., Path] = run_job,
+    prefetch: int = 0,
+    **kwargs,
+) -> dict[Path, str]:
+    """Runs jobs on a process pool, isolating failures to the job
+
+    Each job is passed to func along with kwargs. Returns the error message
+    of each failed job, keyed on network.
+
+    With one worker, up to prefetch networks are read ahead in a background
+    thread while the current one is processed, so reading and extraction
+    overlap. Processes of a pool already overlap, so read their own.
+    """
+
+    failures = {}
+
+    if workers == 1:
+        if prefetch > 0:
+            kind = "plots" if func is render_job else "results"
+            items = _prefetch(
+                jobs, lambda x, y: _read_job(x, y, kind=kind, **kwargs), prefetch
+            )
+        else:
+            items = ((network, save_dir, None) for network, save_dir in jobs)
+
+        for network, save_dir, prefetched in items:
+            try:
+                func(network, save_dir, prefetched=prefetched, **kwargs)
+            except Exception:
+                logging.exception(f"Failed to process {network}")
+                failures[network] = traceback.format_exc()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = {
+                pool.submit(func, network, save_dir, **kwargs): network
+                for network, save_dir in jobs
+            }
+            for future in as_completed(futures):
+                network = futures[future]
+                try:
+                    logging.info(f"Finished {future.result()}")
+                except Exception:
+                    logging.exception(f"Failed to process {network}")
+                    failures[network] = traceback.format_exc()
+
+    _log_summary(jobs, failures)
+    return failures
+
+
+def _log_summary(jobs: list[tuple[Path, Path]], failures: dict[Path, str]) -> None:
+    logging.info(f"Processed {len(jobs) - len(failures)} of {len(jobs)} networks")
+    for network, error in failures.items():
+        logging.error(f"Failed: {network}\n{error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of networks to process in parallel",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Reprocess all networks, ignoring existing manifests",
+    )
+    parser.add_argument(
+        "-c",
+        "--columnar",
+        action="store_true",
+        help="Read networks from columnar caches written by convert_networks.py",
+    )
+    parser.add_argument(
+        "-p",
+        "--plots",
+        choices=["inline", "skip", "defer"],
+        default="inline",
+        help="Render plots with the data, skip them, or render them after all "
+        "data is extracted",
+    )
+    parser.add_argument("--dpi", type=int, default=400, help="Plot resolution")
+    parser.add_argument("--format", default="png", help="Plot file format")
+    parser.add_argument(
+        "--profile",
+        help="Append timing and memory of each result and phase to this JSON "
+        "lines file",
+    )
+    parser.add_argument(
+        "--float32",
+        action="store_true",
+        help="Hold time series in float32, about halving memory per worker",
+    )
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="Leave netCDF time series on disk, reading them a chunk at a time",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        help="Networks to read ahead while one is processed (one worker only)",
+    )
+    args = parser.parse_args()
+
+    # figures are only written to file
+    matplotlib.use("Agg")
+
+    jobs = get_jobs()
+
+    failures = run_jobs(
+        jobs,
+        workers=args.workers,
+        force=args.force,
+        columnar=args.columnar,
+        plots=args.plots,
+        dpi=args.dpi,
+        fmt=args.format,
+        profile=args.profile,
+        reduced_precision=args.float32,
+        lazy=args.lazy,
+        prefetch=args.prefetch,
+    )
+
+    if args.plots == "defer":
+        done = [x for x in jobs if x[0] not in failures]
+        failures |= run_jobs(
+            done,
+            workers=args.workers,
+            func=render_job,
+            force=args.force,
+            columnar=args.columnar,
+            dpi=args.dpi,
+            fmt=args.format,
+            profile=args.profile,
+            reduced_precision=args.float32,
+            lazy=args.lazy,
+            prefetch=args.prefetch,
+        )
+
+    if failures:
+        raise SystemExit(1)
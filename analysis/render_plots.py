@@ -0,0 +1,54 @@
+"""Renders plots for networks that have already been extracted
+
+Use after running extract_results.py with --plots skip, or to regenerate
+figures at a different resolution or format. Only plots missing from each
+output directory's manifest are rendered unless --force is given.
+"""
+
+from extract_results import get_jobs, render_job, run_jobs
+import argparse
+import matplotlib
+
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of networks to render in parallel",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Render all plots, ignoring existing manifests",
+    )
+    parser.add_argument(
+        "-c",
+        "--columnar",
+        action="store_true",
+        help="Read networks from columnar caches written by convert_networks.py",
+    )
+    parser.add_argument("--dpi", type=int, default=400, help="Plot resolution")
+    parser.add_argument("--format", default="png", help="Plot file format")
+    args = parser.parse_args()
+
+    matplotlib.use("Agg")
+
+    failures = run_jobs(
+        get_jobs(),
+        workers=args.workers,
+        func=render_job,
+        force=args.force,
+        columnar=args.columnar,
+        dpi=args.dpi,
+        fmt=args.format,
+    )
+    if failures:
+        raise SystemExit(1)
@@ -1,9 +1,20 @@
 """Utility functions and constants for analysis"""
 
+import functools
+import itertools
 import pandas as pd
 from pathlib import Path
 from typing import Optional
 
+from pypsadr.store import (
+    DATAFRAME,
+    DATAPOINT,
+    coalesce_values,
+    long_to_dataframe,
+    long_to_datapoint,
+    read_results,
+)
+
 # scenario naming conventions (DO NOT CHANGE)
 SECTORS = ["e", "t", "et"]
 DR_PRICES = ["high", "mid", "low", "vlow"]
@@ -26,8 +37,14 @@ METHOD_NICE_NAMES = {
     "dynamic": "Carrier Specific Price",
 }
 
+# Bulk loading
+ALL = "all"
+DIMENSIONS = ["region", "scenario", "method", "sector", "dr_price"]
+CACHE_SIZE = 256  # number of reads held in memory
+
 # Path handling (DO NOT CHANGE)
 DATA_DIR = Path("..", "data")
+RESULTS_DIR = Path(DATA_DIR, "results")
 
 
 def get_scenario_name(
@@ -61,38 +78,58 @@ def get_scenario_name(
     return f"{sector}-{dr_price}-{scenario}"
 
 
-def get_datapoint(
+def _get_result_filters(
     region: str,
     scenario: str,
     result: str,
     method: Optional[str] = None,
     sector: Optional[str] = None,
     dr_price: Optional[str] = None,
-) -> pd.DataFrame:
-    """Get the datapoint for a given NG price, sector, and DR price"""
+) -> dict[str, Optional[str]]:
+    """Gets results store filters of a single run"""
     assert region in REGIONS, f"Invalid region: {region}. Expected one of {REGIONS}"
-    scenario = get_scenario_name(scenario, sector, dr_price)
 
     if method:
         assert method in METHODS, f"Invalid method: {method}. Expected one of {METHODS}"
         assert sector and dr_price, "Sector and DR price must be provided"
-        p = Path(
-            DATA_DIR,
-            region,
-            "processed",
-            method,
-            scenario,
-            "datapoint",
-            f"{result}.csv",
-        )
+        # accept full run names, ie. "e-high-mgas"
+        scenario = scenario.removeprefix(f"{sector}-{dr_price}-")
     else:
-        p = Path(DATA_DIR, region, "processed", scenario, "datapoint", f"{result}.csv")
+        sector = dr_price = None
+
+    return {
+        "region": region,
+        "study": "main",
+        "result": result,
+        "scenario": scenario,
+        "method": method,
+        "sector": sector,
+        "dr_price": dr_price,
+    }
+
+
+def get_datapoint(
+    region: str,
+    scenario: str,
+    result: str,
+    method: Optional[str] = None,
+    sector: Optional[str] = None,
+    dr_price: Optional[str] = None,
+) -> pd.DataFrame:
+    """Get the datapoint for a given NG price, sector, and DR price"""
+    get_scenario_name(scenario, sector, dr_price)  # validates
+    filters = _get_result_filters(region, scenario, result, method, sector, dr_price)
+
+    if not RESULTS_DIR.exists():
+        return _read_csv_result(DATAPOINT, filters)
+
+    long = _read_store(DATAPOINT, filters)
 
-    assert p.exists(), (
+    assert not long.empty, (
         f"Data point not found for:\nRegion={region}\nScenario={scenario}\nSector={sector}\nDr_Price={dr_price}\nMethod={method}\nResult={result}"
     )
 
-    return pd.read_csv(p, index_col=0)
+    return long_to_datapoint(long)
 
 
 def get_dataframe(
@@ -104,26 +141,238 @@ def get_dataframe(
     dr_price: Optional[str] = None,
 ) -> pd.DataFrame:
     """Get the dataframe for a given NG price, sector, and DR price"""
-    assert region in REGIONS, f"Invalid region: {region}. Expected one of {REGIONS}"
-    # scenario = get_scenario_name(scenario, sector, dr_price)
+    filters = _get_result_filters(region, scenario, result, method, sector, dr_price)
 
-    if method:
-        assert method in METHODS, f"Invalid method: {method}. Expected one of {METHODS}"
-        assert sector and dr_price, "Sector and DR price must be provided"
-        p = Path(
-            DATA_DIR,
-            region,
-            "processed",
-            method,
-            scenario,
-            "dataframe",
-            f"{result}.csv",
+    if not RESULTS_DIR.exists():
+        return _read_csv_result(DATAFRAME, filters)
+
+    long = _read_store(DATAFRAME, filters)
+
+    assert not long.empty, (
+        f"Dataframe not found for:\nRegion={region}\nScenario={scenario}\nSector={sector}\nDr_Price={dr_price}\nMethod={method}\nResult={result}"
+    )
+
+    return long_to_dataframe(long)
+
+
+def _read_csv_result(kind: str, filters: dict[str, Optional[str]]) -> pd.DataFrame:
+    """Reads a result from per-run CSVs, as in the Zenodo processed data"""
+    if filters["method"]:
+        scenario = get_scenario_name(
+            filters["scenario"], filters["sector"], filters["dr_price"]
         )
+        run_dir = Path(filters["method"], scenario)
     else:
-        p = Path(DATA_DIR, region, "processed", scenario, "dataframe", f"{result}.csv")
+        run_dir = Path(filters["scenario"])
 
-    assert p.exists(), (
-        f"Dataframe not found for:\nRegion={region}\nScenario={scenario}\nSector={sector}\nDr_Price={dr_price}\nMethod={method}\nResult={result}"
+    p = Path(
+        DATA_DIR,
+        filters["region"],
+        "processed",
+        run_dir,
+        kind,
+        f"{filters['result']}.csv",
+    )
+    assert p.exists(), f"{kind} not found at {p}"
+
+    return _read_csv(p)
+
+
+def get_datapoints(
+    results: str | list[str],
+    regions: str | list[str] = ALL,
+    scenarios: str | list[str] = ALL,
+    methods: str | list[Optional[str]] = ALL,
+    sectors: str | list[Optional[str]] = ALL,
+    dr_prices: str | list[Optional[str]] = ALL,
+) -> pd.DataFrame:
+    """Get datapoints of many runs as one long dataframe
+
+    Each dimension takes a value, a list of values or "all". Baseline runs have
+    no method, sector or DR price; pass None in a list to select them. Returns
+    one row per metric, with the dimensions, result, metric and value as
+    columns.
+    """
+    filters = _get_bulk_filters(
+        results, regions, scenarios, methods, sectors, dr_prices
+    )
+
+    if RESULTS_DIR.exists():
+        long = _read_store(DATAPOINT, filters)
+        long["value"] = coalesce_values(long)
+    else:
+        long = _read_csv_results(DATAPOINT, filters)
+
+    return long[DIMENSIONS + ["result", "metric", "value"]].reset_index(drop=True)
+
+
+def get_dataframes(
+    results: str | list[str],
+    regions: str | list[str] = ALL,
+    scenarios: str | list[str] = ALL,
+    methods: str | list[Optional[str]] = ALL,
+    sectors: str | list[Optional[str]] = ALL,
+    dr_prices: str | list[Optional[str]] = ALL,
+) -> pd.DataFrame:
+    """Get dataframes of many runs as one long dataframe
+
+    Takes the same dimensions as get_datapoints. Returns one row per cell, with
+    the dimensions, result, index (timestep or label), column and value as
+    columns.
+    """
+    filters = _get_bulk_filters(
+        results, regions, scenarios, methods, sectors, dr_prices
+    )
+
+    if RESULTS_DIR.exists():
+        long = _read_store(DATAFRAME, filters)
+        index = long["index_time"].astype(object)
+        index = index.where(long["index_time"].notna(), long["index_str"])
+        long["index"] = index.where(index.notna(), long["row"])
+        long["value"] = coalesce_values(long)
+    else:
+        long = _read_csv_results(DATAFRAME, filters)
+
+    columns = DIMENSIONS + ["result", "index", "column", "value"]
+    return long[columns].reset_index(drop=True)
+
+
+def clear_cache() -> None:
+    """Clears results held in memory"""
+    _read_store_files.cache_clear()
+    _read_csv_file.cache_clear()
+
+
+def _get_bulk_filters(
+    results: str | list[str],
+    regions: str | list[str],
+    scenarios: str | list[str],
+    methods: str | list[Optional[str]],
+    sectors: str | list[Optional[str]],
+    dr_prices: str | list[Optional[str]],
+) -> dict[str, list[Optional[str]]]:
+    """Validates dimensions once and gets results store filters
+
+    Dimensions that are "all" are not filtered on.
+    """
+    dimensions = {
+        "region": (regions, REGIONS),
+        "scenario": (scenarios, NG_PRICES + ERS),
+        "method": (methods, METHODS + [None]),
+        "sector": (sectors, SECTORS + [None]),
+        "dr_price": (dr_prices, DR_PRICES + [None]),
+    }
+
+    filters = {"study": ["main"], "result": _as_list(results)}
+    for dimension, (values, accepted) in dimensions.items():
+        if values == ALL:
+            continue
+        values = _as_list(values)
+        invalid = [x for x in values if x not in accepted]
+        assert not invalid, f"Invalid {dimension}: {invalid}. Expected {accepted}"
+        filters[dimension] = values
+    return filters
+
+
+def _as_list(values: Optional[str] | list[Optional[str]]) -> list[Optional[str]]:
+    if isinstance(values, (list, tuple, set)):
+        return list(values)
+    return [values]
+
+
+def _read_store(kind: str, filters: dict) -> pd.DataFrame:
+    """Reads from the results store, cached on the files it would read
+
+    The cache is keyed on the path and modification time of the files of the
+    filtered regions and results, so results written since the last read are
+    always picked up, without listing the rest of the store.
+    """
+    files = tuple(
+        (str(x), x.stat().st_mtime_ns) for x in sorted(_get_store_files(kind, filters))
+    )
+    key = tuple(
+        (x, tuple(y) if isinstance(y, list) else y) for x, y in sorted(filters.items())
     )
+    return _read_store_files(str(RESULTS_DIR), kind, key, files).copy()
+
+
+def _get_store_files(kind: str, filters: dict) -> list[Path]:
+    """Gets files of the store that may hold rows matching the filters
+
+    Files are laid out as <kind>/region=<region>/<run>/<result>.parquet.
+    """
+    regions = filters.get("region")
+    results = filters.get("result")
+    region_dirs = [f"region={x}" for x in _as_list(regions)] if regions else ["*"]
+    names = [f"{x}.parquet" for x in _as_list(results)] if results else ["*.parquet"]
+
+    files = []
+    for region_dir, name in itertools.product(region_dirs, names):
+        files += Path(RESULTS_DIR, kind).glob(f"{region_dir}/*/{name}")
+    return files
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _read_store_files(
+    root: str, kind: str, filters: tuple, files: tuple[tuple[str, int], ...]
+) -> pd.DataFrame:
+    filters = {x: list(y) if isinstance(y, tuple) else y for x, y in filters}
+    return read_results(root, kind, filters)
 
+
+def _read_csv(p: Path) -> pd.DataFrame:
+    """Reads a CSV, cached on its path and modification time"""
+    return _read_csv_file(str(p), p.stat().st_mtime_ns).copy()
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _read_csv_file(p: str, mtime_ns: int) -> pd.DataFrame:
     return pd.read_csv(p, index_col=0)
+
+
+def _read_csv_results(kind: str, filters: dict) -> pd.DataFrame:
+    """Reads results of many runs from per-run CSVs in long format"""
+    runs = [(None, None, None)] + list(
+        itertools.product(
+            [x for x in filters.get("method", METHODS) if x],
+            [x for x in filters.get("sector", SECTORS) if x],
+            [x for x in filters.get("dr_price", DR_PRICES) if x],
+        )
+    )
+
+    dfs = []
+    for region, scenario, result in itertools.product(
+        filters.get("region", REGIONS),
+        filters.get("scenario", NG_PRICES + ERS),
+        filters["result"],
+    ):
+        for method, sector, dr_price in runs:
+            run = {
+                "region": region,
+                "scenario": scenario,
+                "method": method,
+                "sector": sector,
+                "dr_price": dr_price,
+                "result": result,
+            }
+            if any(run[x] not in filters.get(x, [run[x]]) for x in DIMENSIONS):
+                continue
+            try:
+                df = _read_csv_result(kind, run)
+            except AssertionError:
+                continue  # run was not extracted
+
+            if kind == DATAPOINT:
+                long = df.rename_axis("metric").reset_index()
+            else:
+                long = (
+                    df.rename_axis("index")
+                    .reset_index()
+                    .melt(id_vars="index", var_name="column")
+                )
+            dfs.append(long.assign(**run))
+
+    if not dfs:
+        columns = DIMENSIONS + ["result", "metric", "index", "column", "value"]
+        return pd.DataFrame(columns=columns)
+    return pd.concat(dfs, ignore_index=True)
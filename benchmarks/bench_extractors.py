@@ -0,0 +1,197 @@
+"""Times and memory profiles every result on synthetic networks
+
+Each result is extracted as a dataframe, a datapoint and a plot, on networks
+of increasing size (see benchmarks/synthetic.py). Every (result, phase) is run
+on a fresh ResultsAccessor, so intermediates are computed within the phase
+rather than reused from a previous one.
+
+Results can be saved as JSON and compared against a saved baseline, flagging
+any phase that got slower or used more memory than the threshold.
+
+pypsadr is imported as an installed package, so run through uv (which
+installs it into the project environment), or set PYTHONPATH=src:
+
+    uv run benchmarks/bench_extractors.py --tiers small medium -o bench.json
+    PYTHONPATH=src python benchmarks/bench_extractors.py --tiers small
+"""
+
+from pypsadr import ResultsAccessor
+from synthetic import make_network
+import matplotlib
+import matplotlib.pyplot as plt
+import argparse
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+matplotlib.use("Agg")
+
+TIERS = {
+    "small": {"n_buses": 1, "snapshots": 8760, "periods": (2030,)},
+    "medium": {
+        "n_buses": 10,
+        "snapshots": 8760,
+        "periods": (2030, 2035),
+        "links_per_carrier": 2,
+        "dr_stores_per_carrier": 2,
+    },
+    "large": {
+        "n_buses": 50,
+        "snapshots": 8760,
+        "periods": (2030, 2035, 2040),
+        "links_per_carrier": 3,
+        "dr_stores_per_carrier": 3,
+    },
+}
+
+PHASES = ["dataframe", "datapoint", "plot"]
+
+
+def run_phase(n, result: str, phase: str) -> None:
+    ra = ResultsAccessor(n)
+    if phase == "dataframe":
+        ra.get_dataframe(result)
+    elif phase == "datapoint":
+        ra.get_datapoint(result)
+    elif phase == "plot":
+        ra.plot(result)
+        plt.close("all")
+    else:
+        raise ValueError(f"Phase must be one of {PHASES}; got {phase}")
+
+
+def profile_phase(n, result: str, phase: str, repeat: int) -> dict:
+    """Gets best wall and cpu time over repeats, and peak traced memory"""
+
+    wall = []
+    cpu = []
+    for _ in range(repeat):
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        run_phase(n, result, phase)
+        wall.append(time.perf_counter() - start_wall)
+        cpu.append(time.process_time() - start_cpu)
+
+    # separate run, as tracing slows down the timed ones
+    tracemalloc.start()
+    try:
+        run_phase(n, result, phase)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"wall_s": min(wall), "cpu_s": min(cpu), "peak_mb": peak / 2**20}
+
+
+def run_benchmarks(
+    tiers: list[str],
+    results: Optional[list[str]] = None,
+    phases: Optional[list[str]] = None,
+    repeat: int = 3,
+) -> list[dict]:
+    results = results or ResultsAccessor.available_results
+    phases = phases or PHASES
+
+    records = []
+    for tier in tiers:
+        n = make_network(**TIERS[tier])
+        print(f"{tier}: {n.name}, {len(n.links)} links, {len(n.stores)} stores")
+
+        for result in results:
+            for phase in phases:
+                record = {"tier": tier, "result": result, "phase": phase}
+                try:
+                    record.update(profile_phase(n, result, phase, repeat))
+                except Exception as ex:
+                    record["error"] = f"{type(ex).__name__}: {ex}"
+                records.append(record)
+                print(format_record(record))
+    return records
+
+
+def format_record(record: dict) -> str:
+    name = f"{record['tier']:<8}{record['result']:<14}{record['phase']:<11}"
+    if "error" in record:
+        return f"{name}error ({record['error']})"
+    return (
+        f"{name}{record['wall_s']:>9.3f} s {record['cpu_s']:>9.3f} s "
+        f"{record['peak_mb']:>9.1f} MB"
+    )
+
+
+def compare(records: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    """Gets phases slower or using more memory than baseline by the threshold"""
+
+    def key(x):
+        return (x["tier"], x["result"], x["phase"])
+
+    previous = {key(x): x for x in baseline if "error" not in x}
+
+    regressions = []
+    for record in records:
+        base = previous.get(key(record))
+        if base is None or "error" in record:
+            continue
+        for metric in ("wall_s", "peak_mb"):
+            if record[metric] > base[metric] * threshold:
+                ratio = record[metric] / base[metric] if base[metric] else float("inf")
+                regressions.append(
+                    f"{' '.join(key(record))} {metric}: "
+                    f"{base[metric]:.3f} -> {record[metric]:.3f} ({ratio:.2f}x)"
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "-t",
+        "--tiers",
+        nargs="+",
+        choices=list(TIERS),
+        default=["small", "medium"],
+        help="Network sizes to run",
+    )
+    parser.add_argument(
+        "-r",
+        "--results",
+        nargs="+",
+        choices=ResultsAccessor.available_results,
+        help="Results to run (default all)",
+    )
+    parser.add_argument(
+        "-p", "--phases", nargs="+", choices=PHASES, help="Phases to run (default all)"
+    )
+    parser.add_argument(
+        "-n", "--repeat", type=int, default=3, help="Timed runs per phase"
+    )
+    parser.add_argument("-o", "--output", help="Save results as JSON")
+    parser.add_argument("-b", "--baseline", help="Compare against saved JSON")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="Ratio to baseline reported as a regression",
+    )
+    args = parser.parse_args()
+
+    records = run_benchmarks(args.tiers, args.results, args.phases, args.repeat)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(records, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(records, baseline, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            raise SystemExit(1)
+        print("No regressions")
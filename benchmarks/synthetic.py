@@ -0,0 +1,273 @@
+"""Synthetic PyPSA-like networks for benchmarks and tests
+
+Builds a NetworkData with the buses, links, generators, stores and time series
+that pypsadr extractors read, in the same shape and naming as PyPSA-USA
+sector networks. Sizes are configurable, so extractors can be profiled
+without the full model outputs.
+
+Each power bus "p<i>" has, for every sector carrier (ie. "res-elec"):
+
+    bus    "p<i> <carrier>"           carrier <carrier>
+    links  "p<i> <carrier>[ <j>]"     p<i> -> p<i> <carrier>
+    stores "p<i> <carrier>-dr[ <j>]"  carrier <carrier>-dr
+
+plus generators, a battery, and a co2 store per sector ("p<i> res-co2").
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+from pypsadr.loader import COMPONENT_NAMES, PERIOD_WEIGHTINGS, NetworkData
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+SECTOR_CARRIERS = [
+    "res-elec",
+    "com-elec",
+    "ind-elec",
+    "trn-elec-veh",
+    "res-total-space-heat",
+    "com-total-space-heat",
+    "res-total-ashp",
+    "com-total-ashp",
+    "ind-heat-pump",
+    "trn-elec-veh-lgt",
+    "trn-lpg-veh",
+    "trn-lpg-veh-lgt",
+]
+
+# carriers with demand response stores
+DR_CARRIERS = [
+    "res-elec",
+    "com-elec",
+    "ind-elec",
+    "trn-elec-veh",
+    "res-total-space-heat",
+    "com-total-space-heat",
+]
+
+GENERATOR_CARRIERS = ["solar", "onwind", "CCGT", "OCGT", "nuclear"]
+
+CO2_SECTORS = ["pwr", "res", "com", "ind", "trn"]
+
+# share of a power bus load served through each sector carrier
+LOAD_SHARES = {
+    "res-elec": 0.35,
+    "com-elec": 0.25,
+    "ind-elec": 0.2,
+    "trn-elec-veh": 0.05,
+    "res-total-ashp": 0.1,
+    "com-total-ashp": 0.05,
+}
+
+MARGINAL_COSTS = {"CCGT": 35.0, "OCGT": 60.0, "nuclear": 10.0}
+
+
+def make_network(
+    n_buses: int = 1,
+    snapshots: int = 8760,
+    periods: tuple[int, ...] = (2030,),
+    links_per_carrier: int | dict[str, int] = 1,
+    dr_stores_per_carrier: int | dict[str, int] = 1,
+    co2_stores: bool = True,
+    sector_carriers: Optional[list[str]] = None,
+    generator_carriers: Optional[list[str]] = None,
+    seed: int = 0,
+) -> NetworkData:
+    """Makes a synthetic network
+
+    Snapshots are hourly and per investment period. Links and stores per
+    carrier can be given for all carriers, or per carrier as a dict (carriers
+    not in the dict get none).
+    """
+
+    rng = np.random.default_rng(seed)
+
+    sector_carriers = sector_carriers or SECTOR_CARRIERS
+    generator_carriers = generator_carriers or GENERATOR_CARRIERS
+    power_buses = [f"p{i}" for i in range(n_buses)]
+
+    snapshot_weightings = _make_snapshot_weightings(snapshots, periods)
+    index = snapshot_weightings.index
+    hours = np.arange(len(index)) % snapshots
+
+    # buses
+    buses = {x: "AC" for x in power_buses}
+    for bus in power_buses:
+        for carrier in sector_carriers:
+            buses[f"{bus} {carrier}"] = carrier
+        if co2_stores:
+            buses[f"{bus} co2"] = "co2"
+    buses = pd.DataFrame({"carrier": pd.Series(buses)})
+
+    # links and their dispatch
+    links = []
+    for bus in power_buses:
+        for carrier in sector_carriers:
+            for name in _get_names(f"{bus} {carrier}", carrier, links_per_carrier):
+                links.append([name, bus, f"{bus} {carrier}", carrier])
+    links = pd.DataFrame(links, columns=["name", "bus0", "bus1", "carrier"])
+    links = links.set_index("name")
+    links["p_nom"] = rng.uniform(500, 1500, len(links))
+    links["p_nom_opt"] = links.p_nom * rng.uniform(1, 1.5, len(links))
+    links["capital_cost"] = rng.uniform(0, 50, len(links))
+    links["marginal_cost"] = 0.0
+
+    shares = links.carrier.map(LOAD_SHARES).fillna(0.05).to_numpy()
+    per_carrier = links.groupby(["bus0", "carrier"]).carrier.transform("size")
+    shares = shares / per_carrier.to_numpy()
+    p0 = _make_load(hours, rng, len(links)) * shares
+    links_p0 = pd.DataFrame(p0, index=index, columns=links.index)
+    links_p1 = -links_p0 * 0.95
+
+    # generators, sized to roughly meet load
+    gens = []
+    for bus in power_buses:
+        for carrier in generator_carriers:
+            gens.append([f"{bus} {carrier}", bus, carrier])
+    gens = pd.DataFrame(gens, columns=["name", "bus", "carrier"]).set_index("name")
+    gens["p_nom"] = rng.uniform(1000, 3000, len(gens))
+    gens["p_nom_opt"] = gens.p_nom * rng.uniform(1, 1.5, len(gens))
+    gens["capital_cost"] = rng.uniform(10, 100, len(gens))
+    gens["marginal_cost"] = gens.carrier.map(MARGINAL_COSTS).fillna(0.0)
+    gens_p = pd.DataFrame(
+        _make_generation(gens.carrier.to_numpy(), hours, rng),
+        index=index,
+        columns=gens.index,
+    )
+
+    # demand response and emission stores
+    stores = []
+    for bus in power_buses:
+        for carrier in [x for x in DR_CARRIERS if x in sector_carriers]:
+            dr = f"{carrier}-dr"
+            for name in _get_names(f"{bus} {dr}", carrier, dr_stores_per_carrier):
+                stores.append([name, f"{bus} {carrier}", dr])
+        if co2_stores:
+            for sector in CO2_SECTORS:
+                stores.append([f"{bus} {sector}-co2", f"{bus} co2", "co2"])
+    stores = pd.DataFrame(stores, columns=["name", "bus", "carrier"]).set_index("name")
+    stores["e_nom"] = 0.0
+    stores["e_nom_opt"] = 0.0
+    stores["marginal_cost_storage"] = np.where(
+        stores.carrier.str.endswith("-dr"), rng.uniform(1, 100, len(stores)), 0.0
+    )
+
+    is_dr = stores.carrier.str.endswith("-dr").to_numpy()
+    e = np.empty((len(index), len(stores)))
+    e[:, is_dr] = rng.normal(0, 20, (len(index), is_dr.sum()))
+    # emissions only grow within a period
+    co2 = np.abs(rng.normal(0, 1, (len(index), (~is_dr).sum())))
+    e[:, ~is_dr] = _cumsum_by_period(co2, len(periods))
+    stores_e = pd.DataFrame(e, index=index, columns=stores.index)
+
+    storage_units = pd.DataFrame(
+        {
+            "bus": power_buses,
+            "carrier": "battery",
+            "p_nom": 100.0,
+            "p_nom_opt": rng.uniform(100, 500, n_buses),
+            "max_hours": 4.0,
+        },
+        index=pd.Index([f"{x} battery" for x in power_buses]),
+    )
+
+    marginal_price = pd.DataFrame(
+        rng.normal(40, 10, (len(index), len(buses))), index=index, columns=buses.index
+    )
+
+    static = {
+        "buses": buses,
+        "links": links,
+        "generators": gens,
+        "stores": stores,
+        "storage_units": storage_units,
+    }
+    dynamic = {
+        "buses": {"marginal_price": marginal_price},
+        "links": {
+            "p0": links_p0,
+            "p1": links_p1,
+            "marginal_cost": pd.DataFrame(index=index),
+        },
+        "generators": {"p": gens_p, "marginal_cost": pd.DataFrame(index=index)},
+        "stores": {"e": stores_e},
+    }
+
+    for list_name, df in static.items():
+        for attr, default in (("build_year", 0), ("lifetime", np.inf)):
+            if list_name in ("links", "generators"):
+                df[attr] = default
+        df.index.name = COMPONENT_NAMES[list_name]
+    for list_name, attrs in dynamic.items():
+        for df in attrs.values():
+            df.columns.name = COMPONENT_NAMES[list_name]
+
+    logger.info(
+        f"Made network with {len(buses)} buses, {len(links)} links, "
+        f"{len(gens)} generators, {len(stores)} stores and {len(index)} snapshots"
+    )
+
+    return NetworkData(
+        static=static,
+        dynamic=dynamic,
+        snapshot_weightings=snapshot_weightings,
+        objective=float(rng.uniform(1e9, 1e10)),
+        name=f"synthetic-{n_buses}x{len(index)}",
+        investment_period_weightings=pd.DataFrame(
+            1.0, index=pd.Index(periods, name="period"), columns=PERIOD_WEIGHTINGS
+        ),
+    )
+
+
+def _get_names(base: str, carrier: str, counts: int | dict[str, int]) -> list[str]:
+    n = counts.get(carrier, 0) if isinstance(counts, dict) else counts
+    if n == 1:
+        return [base]
+    return [f"{base} {i}" for i in range(n)]
+
+
+def _make_snapshot_weightings(snapshots: int, periods: tuple[int, ...]) -> pd.DataFrame:
+    timesteps = [
+        pd.date_range(f"{x}-01-01", periods=snapshots, freq="h") for x in periods
+    ]
+    index = pd.MultiIndex.from_arrays(
+        [np.repeat(periods, snapshots), np.concatenate(timesteps)],
+        names=["period", "timestep"],
+    )
+    return pd.DataFrame(1.0, index=index, columns=["objective", "stores", "generators"])
+
+
+def _make_load(hours: np.ndarray, rng: np.random.Generator, n: int) -> np.ndarray:
+    """Gets hourly load with seasonal and daily cycles, one column per series"""
+    seasonal = 1 + 0.3 * np.cos(2 * np.pi * (hours / 8760 - 0.55))
+    daily = 1 + 0.2 * np.sin(2 * np.pi * (hours % 24 - 9) / 24)
+    base = 4000 * seasonal * daily
+    noise = rng.normal(1, 0.05, (len(hours), n))
+    return base[:, None] * noise
+
+
+def _make_generation(
+    carriers: np.ndarray, hours: np.ndarray, rng: np.random.Generator
+) -> np.ndarray:
+    """Gets hourly dispatch of each generator based on its carrier"""
+    p = np.empty((len(hours), len(carriers)))
+    daylight = np.clip(np.sin(2 * np.pi * (hours % 24 - 6) / 24), 0, None)
+    for i, carrier in enumerate(carriers):
+        if carrier == "solar":
+            p[:, i] = 1500 * daylight * rng.uniform(0.6, 1, len(hours))
+        elif carrier in ("onwind", "offwind_floating"):
+            p[:, i] = np.clip(800 + rng.normal(0, 300, len(hours)), 0, None)
+        else:
+            p[:, i] = rng.uniform(200, 1500, len(hours))
+    return p
+
+
+def _cumsum_by_period(values: np.ndarray, n_periods: int) -> np.ndarray:
+    blocks = np.array_split(values, n_periods)
+    return np.concatenate([x.cumsum(axis=0) for x in blocks])
@@ -1,3 +1,10 @@
 from .main import ResultsAccessor
+from .loader import NetworkData, load_network
+from .log import configure_logging
 
-__all__ = ["ResultsAccessor"]
+import logging
+
+# nothing is logged unless configured, see configure_logging
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+__all__ = ["ResultsAccessor", "NetworkData", "load_network", "configure_logging"]
@@ -0,0 +1,136 @@
+"""Aggregation of component time series to carriers
+
+Components are mapped to groups (carriers or their nice names) with a sparse
+components x groups matrix. A snapshots x components block is then aggregated
+with sparse matrix multiplies, rather than transposing the block and grouping
+on column labels.
+
+Columns are read and reduced in chunks of at most CHUNK_BYTES, so the memory
+used on top of the input is bounded no matter how many components are
+selected. Inputs backed by a memory map (see pypsadr.columnar) are only paged
+in a chunk at a time.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import Iterator, Optional
+
+from .constants import CHUNK_BYTES
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CarrierAggregator:
+    """Sparse mapping of components to groups
+
+    Gives the same result as `df.T.groupby(labels).sum().T` (or `.mean()`),
+    with groups in sorted order and NaNs skipped.
+    """
+
+    def __init__(self, labels: pd.Series):
+        """Labels are the group of each component, indexed on component name"""
+
+        groups, codes = np.unique(labels.to_numpy(dtype=str), return_inverse=True)
+
+        self.components = pd.Index(labels.index)
+        self.groups = pd.Index(groups)
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(codes)), (np.arange(len(codes)), codes)),
+            shape=(len(codes), len(groups)),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"CarrierAggregator of {len(self.components)} components "
+            f"to {len(self.groups)} groups"
+        )
+
+    def aggregate(self, df: pd.DataFrame, how: str = "sum") -> pd.DataFrame:
+        """Aggregates a snapshots x components block to snapshots x groups
+
+        Columns of df can be any subset of the components. Groups with no
+        columns in df are dropped.
+        """
+
+        if how not in ("sum", "mean"):
+            raise ValueError(f"Aggregation must be 'sum' or 'mean'; got {how}")
+
+        positions = self.components.get_indexer(df.columns)
+        if (positions < 0).any():
+            missing = df.columns[positions < 0].to_list()
+            raise KeyError(f"Components {missing} are not in the aggregator")
+
+        matrix = self.matrix[positions]
+        present = np.flatnonzero(matrix.getnnz(axis=0))
+        matrix = matrix[:, present]
+
+        data = np.zeros((len(df), len(present)))
+        counts = np.zeros((len(df), len(present))) if how == "mean" else None
+        for columns, values in iter_column_chunks(df):
+            nans = np.isnan(values)
+            if nans.any():
+                values = np.where(nans, 0.0, values)
+
+            # (groups x components) @ (components x snapshots), so only the
+            # stored ones of the mapping are multiplied
+            chunk = matrix[columns].T
+            data += (chunk @ values.T).T
+            if counts is not None:
+                counts += (chunk @ (~nans).T.astype(float)).T
+
+        if how == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                data = data / counts
+
+        return pd.DataFrame(
+            data,
+            index=df.index,
+            columns=self.groups[present].rename(df.columns.name),
+        )
+
+
+def iter_column_chunks(
+    df: pd.DataFrame,
+    columns: Optional[pd.Index] = None,
+    chunk_bytes: int = CHUNK_BYTES,
+) -> Iterator[tuple[slice, np.ndarray]]:
+    """Iterates over selected columns of df as float arrays of bounded size
+
+    Yields the slice of the selection each chunk covers and a snapshots x
+    chunk array. Columns default to all columns of df.
+    """
+
+    if columns is None:
+        positions = np.arange(len(df.columns))
+    else:
+        positions = df.columns.get_indexer(columns)
+        if (positions < 0).any():
+            missing = pd.Index(columns)[positions < 0].to_list()
+            raise KeyError(f"Columns {missing} are not in the block")
+
+    size = max(1, chunk_bytes // max(8 * len(df), 1))
+    for start in range(0, len(positions), size):
+        chunk = slice(start, start + size)
+        yield chunk, df.iloc[:, positions[chunk]].to_numpy(dtype=float)
+
+
+def sum_columns(
+    df: pd.DataFrame,
+    columns: Optional[pd.Index] = None,
+    chunk_bytes: int = CHUNK_BYTES,
+) -> pd.Series:
+    """Sums selected columns of a snapshots x components block, row wise
+
+    Same as `df[columns].sum(axis=1)`, with NaNs skipped, but without copying
+    the selection as a whole.
+    """
+
+    total = np.zeros(len(df))
+    for _, values in iter_column_chunks(df, columns, chunk_bytes):
+        total += np.nansum(values, axis=1)
+    return pd.Series(total, index=df.index)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Hashable
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResultsCache:
+    """Memo of intermediate results shared by all extractors of one network
+
+    Intermediates (net load, ramping, etc.) are keyed on name and the
+    investment periods they are computed over, so extractors of every year
+    share them; views of one year also key on the year. The owner is
+    responsible for calling `clear()` when the network changes, and only then.
+    """
+
+    def __init__(self):
+        self._data: dict[Hashable, Any] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Returns cached value for key, computing it with func on a miss"""
+        if key not in self._data:
+            logger.debug(f"Cache miss for {key}")
+            self._data[key] = func()
+        return self._data[key]
+
+    def release(self, name: str) -> None:
+        """Drops the intermediate name, including all keys starting with it"""
+        keys = [
+            x
+            for x in self._data
+            if x == name or (isinstance(x, tuple) and x and x[0] == name)
+        ]
+        for key in keys:
+            del self._data[key]
+        if keys:
+            logger.debug(f"Released {len(keys)} cached {name}")
+
+    def clear(self) -> None:
+        logger.debug(f"Clearing {len(self._data)} cached intermediates")
+        self._data.clear()
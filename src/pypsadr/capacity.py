@@ -1,23 +1,27 @@
 from __future__ import annotations
 
 import pandas as pd
+from typing import TYPE_CHECKING
 import numpy as np
-import matplotlib.pyplot as plt
 
 from .extractor import ResultsExtractor
 from .utils import get_sector_slicer
 from .constants import (
     CARRIER_MAP,
+    COMPONENT_LIST_NAMES,
 )
 
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class Capacity(ResultsExtractor):
-    def __init__(self, n, year=None):
-        super().__init__(n, year)
+    def __init__(self, n, year=None, cache=None, periods=None):
+        super().__init__(n, year, cache, periods)
 
     def extract_dataframe(self) -> pd.DataFrame:
         dfs = []
@@ -50,8 +54,7 @@ class Capacity(ResultsExtractor):
         )
 
     def _get_installed_capacity(self, component: str) -> pd.DataFrame:
-        for x in self.n.iterate_components([component]):
-            df = x.df
+        df = getattr(self.n, COMPONENT_LIST_NAMES[component])
 
         return (
             df["p_nom"]
@@ -63,8 +66,7 @@ class Capacity(ResultsExtractor):
         )
 
     def _get_optimial_capacity(self, component: str) -> pd.DataFrame:
-        for x in self.n.iterate_components([component]):
-            df = x.df
+        df = getattr(self.n, COMPONENT_LIST_NAMES[component])
 
         return (
             df["p_nom_opt"]
@@ -131,6 +133,8 @@ class Capacity(ResultsExtractor):
         return transport.groupby(level=0).sum()
 
     def plot(self, save=None, **kwargs) -> tuple[plt.figure, plt.axes]:
+        import matplotlib.pyplot as plt
+
         # fontsize = kwargs.get("fontsize", 12)
 
         # custom figure size
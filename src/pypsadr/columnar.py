@@ -0,0 +1,193 @@
+"""Columnar on-disk cache of networks
+
+Networks are converted once into a directory of uncompressed Arrow (Feather
+v2) files, one per static table and per time series attribute:
+
+    <cache_dir>/meta.json
+    <cache_dir>/snapshots.arrow
+    <cache_dir>/investment_periods.arrow
+    <cache_dir>/<list_name>.arrow
+    <cache_dir>/<list_name>_t/<attr>.arrow
+
+Files are memory mapped on read, so opening a cache is near instant and only
+the columns that are used are paged in from disk.
+"""
+
+from __future__ import annotations
+
+import json
+import pandas as pd
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+
+from .loader import (
+    COMPONENT_NAMES,
+    SNAPSHOT_WEIGHTINGS,
+    STATIC_DEFAULTS,
+    NetworkData,
+    get_required_variables,
+)
+
+if TYPE_CHECKING:
+    import pypsa
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+META_NAME = "meta.json"
+
+# what is written to the cache, keyed on component list name
+CACHE_TIME_SERIES = {
+    "links": ["p0", "p1", "marginal_cost"],
+    "generators": ["p", "marginal_cost"],
+    "stores": ["e"],
+    "buses": ["marginal_price"],
+}
+CACHE_STATIC = ["buses", "generators", "links", "stores", "storage_units"]
+
+
+def is_columnar(path: str | Path) -> bool:
+    return Path(path, META_NAME).exists()
+
+
+def write_columnar(
+    n: pypsa.Network | NetworkData,
+    cache_dir: str | Path,
+    source: Optional[str | Path] = None,
+) -> Path:
+    """Writes the network variables used by pypsadr to a columnar cache"""
+    from pyarrow import feather
+
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    logger.info(f"Writing columnar cache to {cache_dir}")
+
+    snapshots = n.snapshot_weightings.reset_index()
+    feather.write_feather(
+        snapshots, cache_dir / "snapshots.arrow", compression="uncompressed"
+    )
+
+    periods = n.investment_period_weightings.rename_axis("period").reset_index()
+    feather.write_feather(
+        periods, cache_dir / "investment_periods.arrow", compression="uncompressed"
+    )
+
+    for list_name in CACHE_STATIC:
+        df = getattr(n, list_name)
+        attrs = [x for x in STATIC_DEFAULTS if x in df.columns]
+        df = df[attrs].rename_axis("name").reset_index()
+        feather.write_feather(
+            df, cache_dir / f"{list_name}.arrow", compression="uncompressed"
+        )
+
+    for list_name, attrs in CACHE_TIME_SERIES.items():
+        ts_dir = cache_dir / f"{list_name}_t"
+        ts_dir.mkdir(exist_ok=True)
+        dynamic = getattr(n, f"{list_name}_t")
+        for attr in attrs:
+            if attr not in dynamic:
+                continue
+            df = dynamic[attr].reset_index(drop=True)
+            df.columns = df.columns.astype(str)
+            feather.write_feather(
+                df, ts_dir / f"{attr}.arrow", compression="uncompressed"
+            )
+
+    meta = {
+        "name": str(getattr(n, "name", "")),
+        "objective": float(n.objective),
+        "source": None if source is None else str(source),
+    }
+    with open(cache_dir / META_NAME, "w") as f:
+        json.dump(meta, f, indent=2)
+
+    return cache_dir
+
+
+def convert_network(network: str | Path, cache_dir: str | Path) -> Path:
+    """Reads a netCDF network and writes it to a columnar cache"""
+    from .loader import load_network
+
+    n = load_network(network)
+    return write_columnar(n, cache_dir, source=network)
+
+
+def open_columnar(
+    cache_dir: str | Path, results: Optional[list[str]] = None
+) -> NetworkData:
+    """Opens a columnar cache as a network, memory mapping the files
+
+    Only the variables needed by the requested results are opened. If these
+    are not known, everything in the cache is opened.
+    """
+    from pyarrow import feather
+
+    cache_dir = Path(cache_dir)
+
+    with open(cache_dir / META_NAME) as f:
+        meta = json.load(f)
+
+    variables = get_required_variables(results)
+    if variables is None:
+        variables = {x: set(STATIC_DEFAULTS) for x in CACHE_STATIC}
+        variables.update({f"{x}_t": set(y) for x, y in CACHE_TIME_SERIES.items()})
+
+    snapshots = _read_table(cache_dir / "snapshots.arrow")
+    levels = [x for x in snapshots.columns if x not in SNAPSHOT_WEIGHTINGS]
+    snapshot_weightings = snapshots.set_index(levels)
+
+    # caches written before periods were stored default to unit weightings
+    p = cache_dir / "investment_periods.arrow"
+    period_weightings = _read_table(p).set_index("period") if p.exists() else None
+
+    static = {}
+    dynamic = {}
+    for component, attrs in variables.items():
+        if component.endswith("_t"):
+            list_name = component[:-2]
+            dynamic[list_name] = {}
+            for attr in attrs:
+                p = cache_dir / component / f"{attr}.arrow"
+                if p.exists():
+                    df = _read_table(p)
+                else:
+                    df = pd.DataFrame(index=range(len(snapshot_weightings)))
+                df.index = snapshot_weightings.index
+                df.columns.name = COMPONENT_NAMES.get(list_name, list_name)
+                dynamic[list_name][attr] = df
+        else:
+            df = _read_table(cache_dir / f"{component}.arrow").set_index("name")
+            df = df[[x for x in df.columns if x in attrs]]
+            for attr in sorted(attrs):
+                if attr not in df.columns:
+                    df[attr] = STATIC_DEFAULTS.get(attr)
+            static[component] = df.rename_axis(COMPONENT_NAMES.get(component))
+
+    for list_name in dynamic:
+        if list_name not in static:
+            df = feather.read_table(
+                cache_dir / f"{list_name}.arrow", columns=["name"], memory_map=True
+            )
+            index = pd.Index(df["name"].to_pylist(), dtype=str)
+            static[list_name] = pd.DataFrame(
+                index=index.rename(COMPONENT_NAMES.get(list_name))
+            )
+
+    return NetworkData(
+        static=static,
+        dynamic=dynamic,
+        snapshot_weightings=snapshot_weightings,
+        objective=meta["objective"],
+        name=meta["name"],
+        investment_period_weightings=period_weightings,
+    )
+
+
+def _read_table(p: Path) -> pd.DataFrame:
+    from pyarrow import feather
+
+    # split_blocks keeps each column as a view on the memory map
+    table = feather.read_table(p, memory_map=True)
+    return table.to_pandas(split_blocks=True)
@@ -82,3 +82,14 @@ CARRIER_MAP = {
     "imports": "Imports",
     "exports": "Exports",
 }
+
+COMPONENT_LIST_NAMES = {
+    "Bus": "buses",
+    "Generator": "generators",
+    "Link": "links",
+    "Store": "stores",
+    "StorageUnit": "storage_units",
+}
+
+# budget of a chunk of columns copied out of a block (see pypsadr.aggregate)
+CHUNK_BYTES = 16 * 2**20
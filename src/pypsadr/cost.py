@@ -1,19 +1,24 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from typing import Optional, TYPE_CHECKING
 
+from .aggregate import iter_column_chunks
 from .extractor import ResultsExtractor
 from .constants import CARRIER_MAP
 
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class Cost(ResultsExtractor):
-    def __init__(self, n, year=None):
-        super().__init__(n, year)
+    def __init__(self, n, year=None, cache=None, periods=None):
+        super().__init__(n, year, cache, periods)
 
     def extract_dataframe(self) -> pd.DataFrame:
         dfs = []
@@ -51,13 +56,12 @@ class Cost(ResultsExtractor):
 
     def _get_marginal_cost(self) -> pd.DataFrame:
         """Average marginal costs per carrier"""
-        return (
-            self.n.buses_t["marginal_price"]
-            .rename(columns=self.n.buses.carrier)
-            .T.groupby(level=0)
-            .mean()
-            .T
-        )
+        return self.get_intermediate("marginal_price_by_carrier").copy()
+
+    def _calc_marginal_cost(self) -> pd.DataFrame:
+        aggregator = self.get_carrier_aggregator("buses", nice_names=False)
+        prices = self.get_series("buses", "marginal_price")
+        return aggregator.aggregate(prices, how="mean")
 
     @staticmethod
     def _filter_carriers_in_sector(df: pd.DataFrame, sector: str) -> pd.DataFrame:
@@ -86,52 +90,129 @@ class Cost(ResultsExtractor):
         if stores.empty:
             return 0.0
 
-        weights = self.n.snapshot_weightings.stores
-        mc = stores.marginal_cost_storage
-        e = self.n.stores_t["e"][stores.index]
-        return e.mul(mc).mul(weights, axis=0).sum().sum()
+        weights = self.n.snapshot_weightings.stores.to_numpy()
+        mc = stores.marginal_cost_storage.to_numpy()
+
+        cost = 0.0
+        for columns, e in iter_column_chunks(self.n.stores_t["e"], stores.index):
+            cost += np.nansum(e * mc[columns] * weights[:, None])
+        return cost
 
     def _get_capex(self) -> float:
-        """Gets capital expenditures"""
+        """Gets capital expenditures of generators and links
 
-        stats = self.n.statistics()
+        Same as the "Capital Expenditure" of n.statistics() summed over
+        generators and links, without computing the other statistics.
+        """
 
-        gens_and_links = stats.loc[(["Generator", "Link"]), :]
-        return round(gens_and_links["Capital Expenditure"].fillna(0).sum().sum(), 6)
+        capex = 0.0
+        for list_name in ("generators", "links"):
+            df = getattr(self.n, list_name)
+            cost = df.p_nom_opt.mul(df.capital_cost)
+            for period, weight in self._get_period_weights().items():
+                if period is not None:
+                    built = df.build_year <= period
+                    alive = period < df.build_year + df.lifetime
+                    capex += cost[built & alive].sum() * weight
+                else:
+                    capex += cost.sum() * weight
+        return round(capex, 6)
 
-        # gens = self.n.generators.copy()
-        # links = self.n.links.copy()
+    def _get_opex(self) -> float:
+        """Gets operational expenditures of generators and links
 
-        # gens["p_nom_new"] = gens["p_nom_opt"] - gens["p_nom"]
-        # links["p_nom_new"] = links["p_nom_opt"] - links["p_nom"]
+        Same as the "Operational Expenditure" of n.statistics() summed over
+        generators and links, for networks with linear marginal costs only.
+        """
 
-        # gens_cost = gens["p_nom_new"].mul(gens["capital_cost"]).sum()
-        # links_cost = links["p_nom_new"].mul(links["capital_cost"]).sum()
+        weights = self.n.snapshot_weightings.objective
+        if isinstance(weights.index, pd.MultiIndex):
+            period_weights = self._get_period_weights()
+            periods = weights.index.get_level_values(0)
+            weights = weights.mul(periods.map(period_weights).values)
 
-        # return round(gens_cost + links_cost, 6)
+        cost = self._get_operation_cost("generators", "p").add(
+            self._get_operation_cost("links", "p0"), fill_value=0
+        )
+        return round(cost.mul(weights).sum(), 6)
 
-    def _get_opex(self) -> float:
-        """Gets operational expenditures"""
+    def _get_operation_cost(self, list_name: str, attr: str) -> pd.Series:
+        """Gets marginal cost of operation summed over components per snapshot"""
+
+        static = getattr(self.n, list_name)
+        dynamic = getattr(self.n, f"{list_name}_t")
 
-        stats = self.n.statistics()
+        p = dynamic[attr]
+        mc = static.marginal_cost.reindex(p.columns).fillna(0).to_numpy(dtype=float)
+        varying = dynamic["marginal_cost"] if "marginal_cost" in dynamic else None
 
-        gens_and_links = stats.loc[(["Generator", "Link"]), :]
-        return round(gens_and_links["Operational Expenditure"].fillna(0).sum().sum(), 6)
+        # summed in chunks of components, so p is never copied as a whole
+        cost = np.zeros(len(p))
+        for columns, values in iter_column_chunks(p):
+            names = p.columns[columns]
+            marginal = np.broadcast_to(mc[columns], values.shape)
 
-        # opex_gens = self._get_gen_opex()
+            # time varying marginal costs override static ones
+            if varying is not None:
+                cols = names.intersection(varying.columns)
+                if len(cols):
+                    marginal = marginal.copy()
+                    marginal[:, names.get_indexer(cols)] = varying[cols].to_numpy(
+                        dtype=float
+                    )
 
-        # stores = [
-        #     x for x in self.n.stores.index if x.endswith((" lpg", " coal", " oil"))
-        # ]
-        # marginal_cost = get_as_dense(self.n, "Store", "marginal_cost").loc[:, stores]
-        # generation = self.n.stores_t["p"].loc[:, stores]
-        # opex_non_gas = generation.mul(marginal_cost).sum().sum()
+            cost += np.nansum(values * marginal, axis=1)
 
-        # opex_gas = self._get_nat_gas_opex()
+        return pd.Series(cost, index=p.index)
+
+    def _get_period_weights(self) -> dict:
+        """Gets objective weighting of each investment period
+
+        Returns {None: 1.0} for networks without investment periods.
+        """
 
-        # return round(opex_gens + opex_non_gas + opex_gas, 6)
+        if len(self.n.investment_periods) == 0:
+            return {None: 1.0}
+        return self.n.investment_period_weightings.objective.to_dict()
+
+    def check_system_costs(self, rtol: Optional[float] = 1e-6) -> pd.DataFrame:
+        """Compares capex and opex against n.statistics()
+
+        Needs a full pypsa.Network. Mismatches are logged as warnings.
+        """
+
+        if not hasattr(self.n, "statistics"):
+            raise TypeError("Checking system costs requires a full pypsa.Network")
+
+        stats = self.n.statistics().loc[(["Generator", "Link"]), :]
+
+        df = pd.DataFrame(
+            [
+                [
+                    "capex",
+                    self._get_capex(),
+                    stats["Capital Expenditure"].fillna(0).sum().sum(),
+                ],
+                [
+                    "opex",
+                    self._get_opex(),
+                    stats["Operational Expenditure"].fillna(0).sum().sum(),
+                ],
+            ],
+            columns=["metric", "value", "statistics"],
+        )
+        df["matches"] = np.isclose(df.value, df.statistics, rtol=rtol)
+
+        for row in df[~df.matches].itertuples():
+            logger.warning(
+                f"{row.metric} of {row.value} does not match statistics {row.statistics}"
+            )
+
+        return df
 
     def plot(self, save=None, **kwargs) -> tuple[plt.figure, plt.axes]:
+        import matplotlib.pyplot as plt
+
         fontsize = kwargs.get("fontsize", 12)
         figsize = kwargs.get("figsize", (20, 6))
 
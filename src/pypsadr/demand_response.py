@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import pandas as pd
-import matplotlib.pyplot as plt
+from typing import TYPE_CHECKING
 
 from .extractor import ResultsExtractor
-from .constants import CARRIER_MAP
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
 
 import logging
 
@@ -12,27 +14,29 @@ logger = logging.getLogger(__name__)
 
 
 class DemandResponse(ResultsExtractor):
-    def __init__(self, n, year=None):
-        super().__init__(n, year)
+    def __init__(self, n, year=None, cache=None, periods=None):
+        super().__init__(n, year, cache, periods)
 
     def extract_dataframe(self) -> pd.DataFrame:
-        dr_stores = self.n.stores[self.n.stores.carrier.str.contains("-dr")]
+        df = self.get_intermediate("demand_response")
 
-        if not dr_stores.empty:
-            stores = dr_stores.index
-            return (
-                self.n.stores_t["e"][stores]
-                .abs()
-                .rename(columns=self.n.stores.carrier)
-                .rename(columns=CARRIER_MAP)
-                .T.groupby(level=0)
-                .sum()
-                .T.loc[self.year]
-            )
+        if not df.empty:
+            return df.loc[self.year]
         else:
             logger.info("No demand response data")
             return pd.DataFrame()
 
+    def _calc_demand_response(self) -> pd.DataFrame:
+        """Gets demand response of the periods in scope"""
+        dr_stores = self.n.stores[self.n.stores.carrier.str.contains("-dr")]
+
+        if dr_stores.empty:
+            return pd.DataFrame()
+
+        aggregator = self.get_carrier_aggregator("stores")
+        e = self.get_series("stores", "e")[dr_stores.index].abs()
+        return aggregator.aggregate(e)
+
     def extract_datapoint(self, **kwargs) -> pd.DataFrame:
         df = self.extract_dataframe()
         if df.empty:
@@ -42,6 +46,8 @@ class DemandResponse(ResultsExtractor):
             return df.sum().to_frame(name="value").reset_index(names="metric")
 
     def plot(self, save=None, **kwargs) -> tuple[plt.figure, plt.axes]:
+        import matplotlib.pyplot as plt
+
         fontsize = kwargs.get("fontsize", 12)
         figsize = kwargs.get("figsize", (20, 6))
 
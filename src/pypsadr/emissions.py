@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import pandas as pd
-import matplotlib.pyplot as plt
 from typing import Optional
 from .extractor import ResultsExtractor
 
@@ -11,8 +10,8 @@ logger = logging.getLogger(__name__)
 
 
 class Emissions(ResultsExtractor):
-    def __init__(self, n, year=None):
-        super().__init__(n, year)
+    def __init__(self, n, year=None, cache=None, periods=None):
+        super().__init__(n, year, cache, periods)
         self.emissions = self.get_emissions()
 
     def extract_dataframe(self) -> pd.DataFrame:
@@ -30,6 +29,8 @@ class Emissions(ResultsExtractor):
         return value
 
     def plot(self, save: Optional[str] = None, **kwargs):
+        import matplotlib.pyplot as plt
+
         fontsize = kwargs.get("fontsize", 12)
         figsize = kwargs.get("figsize", (20, 6))
 
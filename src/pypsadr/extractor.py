@@ -1,8 +1,17 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+import numpy as np
 import pandas as pd
-from typing import Optional, Any
-import matplotlib.pyplot as plt
-import pypsa
+from typing import Callable, Optional, Any, TYPE_CHECKING
+
+from .aggregate import CarrierAggregator, sum_columns
+from .cache import ResultsCache
+from .constants import CARRIER_MAP
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+    import pypsa
 
 import logging
 
@@ -10,16 +19,45 @@ logger = logging.getLogger(__name__)
 
 
 class ResultsExtractor(ABC):
+    """Extracts a result from a network
+
+    Network variables read and intermediates shared with other extractors are
+    declared in pypsadr.registry.
+
+    Intermediates are computed over the periods in scope, which default to
+    the year only. Time series are sliced to these periods first (see
+    get_series), so later arithmetic only touches the rows used. Extractors
+    of every period share intermediates by all having all periods in scope.
+    """
+
     ELEC_CARRIERS = ["res-elec", "com-elec", "ind-elec", "trn-elec-veh"]
 
-    def __init__(self, n: pypsa.Network, year: Optional[int] = None):
+    def __init__(
+        self,
+        n: pypsa.Network,
+        year: Optional[int] = None,
+        cache: Optional[ResultsCache] = None,
+        periods: Optional[tuple[int, ...]] = None,
+    ):
         self.n = n
         self._year = year
+        self._cache = cache if cache is not None else ResultsCache()
+        if periods is None:
+            periods = () if year is None else (year,)
+        self._periods = tuple(periods)
 
     @property
     def year(self):
         return self._year
 
+    @property
+    def periods(self) -> tuple[int, ...]:
+        """Investment periods intermediates are computed over (all if empty)"""
+        all_periods = tuple(self.n.investment_periods)
+        if not self._periods or set(all_periods) <= set(self._periods):
+            return all_periods
+        return self._periods
+
     @abstractmethod
     def extract_dataframe() -> pd.DataFrame:
         pass
@@ -33,47 +71,221 @@ class ResultsExtractor(ABC):
     def plot(save: Optional[str] = None, **kwargs) -> tuple[plt.figure, plt.axes]:
         pass
 
+    def get_intermediate(self, name: str) -> Any:
+        """Gets a shared intermediate, computing it on a miss
+
+        Not copied, so must not be modified.
+        """
+        from .registry import compute_intermediate
+
+        return self._get_scoped(
+            (name,),
+            lambda: compute_intermediate(name, self.n, self.year, self._cache, self),
+        )
+
+    def _get_scoped(self, key: tuple, func: Callable[[], Any]) -> Any:
+        """Gets a cached value computed over the periods in scope
+
+        The value of all periods is used if cached, as it covers any scope.
+        """
+        widest = (*key, tuple(self.n.investment_periods))
+        if widest in self._cache:
+            return self._cache.get(widest, func)
+        return self._cache.get((*key, self.periods), func)
+
+    def get_series(self, list_name: str, attr: str) -> pd.DataFrame:
+        """Gets a time series block, sliced to the rows of periods in scope
+
+        Indexed on snapshot as the network. A single period is sliced as a
+        view, as its snapshots are contiguous.
+        """
+        df = getattr(self.n, f"{list_name}_t")[attr]
+        rows = self._get_period_rows()
+        return df if rows is None else df.iloc[rows]
+
+    def _get_period_rows(self) -> Optional[slice | np.ndarray]:
+        """Gets positions of snapshots in scope, None if all snapshots are"""
+        snapshots = self.n.snapshots
+        if not isinstance(snapshots, pd.MultiIndex):
+            return None
+        if self.periods == tuple(self.n.investment_periods):
+            return None
+
+        periods = snapshots.get_level_values(0)
+        if len(self.periods) == 1:
+            loc = periods.get_loc(self.periods[0])
+            if isinstance(loc, slice):
+                return loc
+        return np.flatnonzero(periods.isin(self.periods))
+
     def get_net_load(self, sorted: Optional[bool] = True) -> pd.DataFrame:
         """Gets base net load dataframe"""
 
-        loads = self._get_electical_load()
-        solar = self._get_renewable_generation("solar")
-        wind = self._get_renewable_generation("wind")
-        df = pd.concat([loads, solar, wind], axis=1)
+        if sorted:
+            df = self._cache.get(("net_load_sorted", self.year), self._sort_net_load)
+        else:
+            df = self._cache.get(("net_load", self.year), self._calc_net_load)
+        return df.copy()
+
+    def get_net_load_all(self) -> pd.DataFrame:
+        """Gets net load of the periods in scope, indexed on snapshot"""
+
+        return self.get_intermediate("net_load_all").copy()
+
+    def _calc_net_load_all(self) -> pd.DataFrame:
+        loads = self.get_intermediate("electrical_load")
+        renewables = self.get_intermediate("renewable_generation")
+        df = pd.concat([loads, renewables], axis=1)
         df["Net_Load_MW"] = round(df.Load_MW - df.Wind_MW - df.Solar_MW, 2)
+        return df
 
-        df = df.loc[self.year].reset_index()
+    def _calc_net_load(self) -> pd.DataFrame:
+        df = self.get_intermediate("net_load_all")
+        return df.loc[self.year].reset_index()
 
-        if sorted:
-            return df.sort_values("Net_Load_MW", ascending=False).reset_index(drop=True)
-        else:
-            return df
+    def _sort_net_load(self) -> pd.DataFrame:
+        df = self.get_net_load(sorted=False)
+        return df.sort_values(
+            "Net_Load_MW", ascending=False, kind="stable"
+        ).reset_index(drop=True)
+
+    def get_net_load_peaks(self, k: int) -> pd.DataFrame:
+        """Gets the k highest net load hours in descending order
+
+        Same rows as the head of get_net_load(sorted=True) without sorting the
+        full year.
+        """
+
+        sorted_key = ("net_load_sorted", self.year)
+        if sorted_key in self._cache:
+            return self.get_net_load(sorted=True).iloc[:k]
+
+        return self._select_period(self.get_net_load_peaks_by_period(k))
+
+    def get_net_load_peaks_by_period(self, k: int) -> pd.DataFrame:
+        """Gets the k highest net load hours of every period in scope
+
+        Rows are in descending order within each period, with the period as a
+        column.
+        """
+
+        def calc() -> pd.DataFrame:
+            df = self.get_intermediate("net_load_all")
+            return self._get_top_k_by_period(df.reset_index(), "Net_Load_MW", k)
+
+        return self._get_scoped(("net_load_peaks", k), calc).copy()
 
     def get_ramping(self) -> pd.DataFrame:
         """Gets base ramping dataframe"""
 
-        net_load = self.get_net_load(sorted=False)
+        return self._cache.get(("ramping", self.year), self._calc_ramping).copy()
 
-        ramp = (
-            net_load[["timestep", "Net_Load_MW"]]
-            .set_index("timestep")
-            .rename(columns={"Net_Load_MW": "Absolute 3-hr Ramping"})
-            .copy()
+    def _calc_ramping_all(self) -> pd.DataFrame:
+        net_load = self.get_intermediate("net_load_all")["Net_Load_MW"]
+
+        # ramps never span two investment periods
+        ramp = net_load.groupby(level=0, sort=False).diff(periods=3).abs()
+        ramp = pd.concat(
+            [ramp.rename("Absolute 3-hr Ramping"), net_load.rename("Net Load")], axis=1
         )
-        ramp = ramp.diff(periods=3)
-        ramp["Absolute 3-hr Ramping"] = ramp["Absolute 3-hr Ramping"].abs()
-        ramp["Net Load"] = net_load.set_index("timestep")["Net_Load_MW"]
-        return ramp.dropna().reset_index(drop=False)
+        return ramp.dropna()
+
+    def _calc_ramping(self) -> pd.DataFrame:
+        ramp = self.get_intermediate("ramping_all")
+        return ramp.loc[self.year].reset_index(drop=False)
 
     def get_daily_max_ramp(self) -> pd.DataFrame:
         """Gets maximum ramping for each day in the year"""
 
-        ramp = self.get_ramping()
-        max_ramp = ramp.sort_values(by=["Absolute 3-hr Ramping"], ascending=False)
-        max_ramp["day"] = max_ramp["timestep"].map(lambda x: f"{x.month}-{x.day}")
-        return max_ramp.drop_duplicates("day").reset_index(drop=True)
+        key = ("daily_max_ramp", self.year)
+        return self._cache.get(key, self._calc_daily_max_ramp).copy()
+
+    def _calc_daily_max_ramp_all(self) -> pd.DataFrame:
+        """Gets maximum ramping of each day of the periods in scope, in time
+        order"""
+
+        ramp = self.get_intermediate("ramping_all").reset_index()
+        ramp["day"] = self._get_day(ramp["timestep"])
+        idx = ramp.groupby(["period", "day"], sort=False)[
+            "Absolute 3-hr Ramping"
+        ].idxmax()
+        return ramp.loc[idx.sort_values()].reset_index(drop=True)
+
+    def _calc_daily_max_ramp(self) -> pd.DataFrame:
+        max_ramp = self.get_intermediate("daily_max_ramp_all")
+        return (
+            self._select_period(max_ramp)
+            .sort_values(by=["Absolute 3-hr Ramping"], ascending=False, kind="stable")
+            .reset_index(drop=True)
+        )
+
+    def get_daily_ramp_peaks(self, k: int) -> pd.DataFrame:
+        """Gets the k days with the highest maximum ramp in descending order
+
+        Same rows as the head of get_daily_max_ramp() without sorting every
+        day in the year.
+        """
+
+        sorted_key = ("daily_max_ramp", self.year)
+        if sorted_key in self._cache:
+            return self.get_daily_max_ramp().iloc[:k]
+
+        return self._select_period(self.get_daily_ramp_peaks_by_period(k))
+
+    def get_daily_ramp_peaks_by_period(self, k: int) -> pd.DataFrame:
+        """Gets the k days with the highest maximum ramp of every period in
+        scope
+
+        Rows are in descending order within each period, with the period as a
+        column.
+        """
+
+        def calc() -> pd.DataFrame:
+            max_ramp = self.get_intermediate("daily_max_ramp_all")
+            return self._get_top_k_by_period(max_ramp, "Absolute 3-hr Ramping", k)
+
+        return self._get_scoped(("daily_ramp_peaks", k), calc).copy()
+
+    def _select_period(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Gets rows of the year from a frame with a period column"""
+        df = df[df["period"] == self.year]
+        return df.drop(columns="period").reset_index(drop=True)
+
+    @staticmethod
+    def _get_day(timesteps: pd.Series) -> pd.Series:
+        """Gets the calendar day (midnight timestamp) used to group ramping"""
+        return timesteps.dt.normalize()
 
-    def _get_electical_load(self) -> pd.DataFrame:
+    @staticmethod
+    def _get_top_k_by_period(
+        df: pd.DataFrame, column: str, k: int, by: str = "period"
+    ) -> pd.DataFrame:
+        """Gets the k rows with largest column values of each period
+
+        Rows are in period order, then descending order. Only rows at or above
+        the k-th largest value of their period are sorted, and ties are broken
+        on position, same as a stable descending sort within each period.
+        """
+
+        values = df[column].to_numpy()
+        periods, uniques = pd.factorize(df[by], sort=True)
+
+        # k-th largest value of each period is the cutoff for its candidates
+        cutoffs = np.empty(len(uniques))
+        for i in range(len(uniques)):
+            group = values[periods == i]
+            kth = min(k, len(group)) - 1
+            cutoffs[i] = -np.partition(-group, kth)[kth]
+
+        candidates = np.flatnonzero(values >= cutoffs[periods])
+        order = candidates[
+            np.lexsort((candidates, -values[candidates], periods[candidates]))
+        ]
+        top = df.iloc[order]
+        rank = top.groupby(by, sort=False).cumcount().to_numpy()
+        return top[rank < k].reset_index(drop=True)
+
+    def _calc_electrical_load(self) -> pd.DataFrame:
         buses = self.n.links[
             self.n.links.carrier.isin(self.ELEC_CARRIERS)
         ].bus0.unique()
@@ -81,9 +293,16 @@ class ResultsExtractor(ABC):
             self.n.links.bus0.isin(buses)
             & self.n.links.carrier.str.startswith(("res", "com", "ind", "trn"))
         ]
-        return self.n.links_t["p0"][links.index].sum(axis=1).to_frame(name="Load_MW")
+        load = sum_columns(self.get_series("links", "p0"), links.index)
+        return load.to_frame(name="Load_MW")
 
-    def _get_renewable_generation(self, carrier: Optional[str] = None) -> pd.DataFrame:
+    def _calc_renewable_generation_all(self) -> pd.DataFrame:
+        """Gets solar and wind generation"""
+        solar = self._calc_renewable_generation("solar")
+        wind = self._calc_renewable_generation("wind")
+        return pd.concat([solar, wind], axis=1)
+
+    def _calc_renewable_generation(self, carrier: Optional[str] = None) -> pd.DataFrame:
         if carrier == "solar":
             gens = self.n.generators[self.n.generators.carrier.isin(["solar"])]
             name = "Solar_MW"
@@ -97,10 +316,41 @@ class ResultsExtractor(ABC):
                 self.n.generators.carrier.isin(["onwind", "offwind_floating", "solar"])
             ]
             name = "Renewable_MW"
-        return self.n.generators_t["p"][gens.index].sum(axis=1).to_frame(name=name)
+        p = self.get_series("generators", "p")
+        return sum_columns(p, gens.index).to_frame(name=name)
+
+    def get_carrier_aggregator(
+        self, list_name: str, nice_names: Optional[bool] = True
+    ) -> CarrierAggregator:
+        """Gets the shared aggregator of components to carriers
+
+        Carriers are mapped to their nice names if nice_names is True.
+        """
+
+        def calc() -> CarrierAggregator:
+            carriers = getattr(self.n, list_name).carrier
+            if nice_names:
+                carriers = carriers.map(lambda x: CARRIER_MAP.get(x, x))
+            return CarrierAggregator(carriers)
+
+        key = ("carrier_aggregator", list_name, nice_names)
+        return self._cache.get(key, calc)
 
     def get_emissions(self) -> pd.DataFrame:
         """Gets emissions dataframe"""
         stores = self.n.stores[self.n.stores.carrier.str.contains("co2")]
         stores_t = self.n.stores_t["e"][stores.index]
         return stores_t.max(axis=0).to_frame(name="Emissions_CO2_MT")
+
+
+class IntermediateExtractor(ResultsExtractor):
+    """Computes shared intermediates only, with no result of its own"""
+
+    def extract_dataframe(self) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def extract_datapoint(self, as_df: Optional[bool] = False) -> Any:
+        raise NotImplementedError
+
+    def plot(self, save: Optional[str] = None, **kwargs) -> tuple[plt.figure, plt.axes]:
+        raise NotImplementedError
@@ -1,14 +1,15 @@
 from __future__ import annotations
 
 import pandas as pd
+from typing import TYPE_CHECKING
 import numpy as np
-import matplotlib.pyplot as plt
 
 from .extractor import ResultsExtractor
 from .utils import get_sector_slicer
-from .constants import (
-    CARRIER_MAP,
-)
+from .constants import COMPONENT_LIST_NAMES
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
 
 import logging
 
@@ -16,18 +17,22 @@ logger = logging.getLogger(__name__)
 
 
 class Generation(ResultsExtractor):
-    def __init__(self, n, year=None):
-        super().__init__(n, year)
+    def __init__(self, n, year=None, cache=None, periods=None):
+        super().__init__(n, year, cache, periods)
 
     def extract_dataframe(self) -> pd.DataFrame:
-        dfs = []
-
-        for c in ["Generator", "Link"]:
-            dfs.append(self._get_generation(c))
+        gens = self._get_generation("Generator")
+        links = self._get_generation("Link")
 
-        df = pd.concat(dfs, axis=1).dropna()
         # demand response will have np.inf
-        return df.replace(np.inf, np.nan).T.groupby(level=0).sum().T
+        gens = gens.replace(np.inf, np.nan).fillna(0)
+        links = links.replace(np.inf, np.nan).fillna(0)
+
+        # carriers can be supplied by both generators and links, and the sum
+        # keeps the component name on the columns, so it is dropped
+        index = gens.index.intersection(links.index)
+        df = gens.loc[index].add(links.loc[index], fill_value=0)
+        return df.rename_axis(columns=None)
 
     def extract_datapoint(self, **kwargs) -> pd.DataFrame:
         return (
@@ -38,26 +43,19 @@ class Generation(ResultsExtractor):
         )
 
     def _get_generation(self, component: str) -> pd.DataFrame:
-        for x in self.n.iterate_components([component]):
-            static = x.static
-            dynamic = x.dynamic
+        dynamic = getattr(self.n, f"{COMPONENT_LIST_NAMES[component]}_t")
 
+        aggregator = self.get_carrier_aggregator(COMPONENT_LIST_NAMES[component])
+
+        # negated after aggregating, so the block is not copied
         if component == "Generator":
-            df = dynamic["p"]
+            return aggregator.aggregate(dynamic["p"])
         elif component == "Link":
-            df = dynamic["p1"].mul(-1)
-
-        carriers = static.carrier.to_dict()
-
-        return (
-            df.rename(columns=carriers)
-            .rename(columns=CARRIER_MAP)
-            .T.groupby(level=0)
-            .sum()
-            .T
-        )
+            return aggregator.aggregate(dynamic["p1"]).mul(-1)
 
     def plot(self, save=None, **kwargs) -> tuple[plt.figure, plt.axes]:
+        import matplotlib.pyplot as plt
+
         # fontsize = kwargs.get("fontsize", 12)
 
         # custom figure size
@@ -0,0 +1,160 @@
+"""Timing and memory instrumentation of result extraction
+
+ResultsAccessor measures each phase (dataframe, datapoint or plot) of each
+result, and passes a record of it to every registered callback:
+
+    {
+        "result": "cost",
+        "extractor": "Cost",
+        "phase": "datapoint",
+        "year": 2030,
+        "network": "...",
+        "pid": 1234,
+        "started": "2025-01-01T00:00:00",
+        "wall_s": 0.51,       # elapsed time
+        "cpu_s": 0.49,        # process cpu time
+        "peak_mb": 120.3,     # peak traced allocations above the start
+        "error": "...",       # only if the phase raised
+    }
+
+Nothing is measured while no callbacks are registered. Peak memory is traced
+with tracemalloc, which slows down allocation heavy phases, so can be turned
+off with set_trace_memory(False).
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import time
+import tracemalloc
+import pandas as pd
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+Record = dict[str, Any]
+
+_callbacks: list[Callable[[Record], None]] = []
+_trace_memory = True
+
+
+def add_callback(callback: Callable[[Record], None]) -> None:
+    """Registers a callback, called with the record of every measured phase"""
+    if callback not in _callbacks:
+        _callbacks.append(callback)
+
+
+def remove_callback(callback: Callable[[Record], None]) -> None:
+    if callback in _callbacks:
+        _callbacks.remove(callback)
+
+
+def clear_callbacks() -> None:
+    _callbacks.clear()
+
+
+def is_enabled() -> bool:
+    return bool(_callbacks)
+
+
+def set_trace_memory(trace: bool) -> None:
+    """Sets if peak memory is traced (peak_mb is None if not)"""
+    global _trace_memory
+    _trace_memory = trace
+
+
+@contextmanager
+def recording(callback: Callable[[Record], None]) -> Iterator[None]:
+    """Registers a callback within the context"""
+    add_callback(callback)
+    try:
+        yield
+    finally:
+        remove_callback(callback)
+
+
+@contextmanager
+def measure(result: Optional[str], phase: str, **info) -> Iterator[Optional[Record]]:
+    """Measures the enclosed phase of a result, if any callbacks are registered
+
+    Result is None for phases of a whole run (ie. loading the network). Extra
+    info (ie. extractor, year) is added to the record. Yields the record
+    (or None if not enabled), which is completed on exit.
+    """
+
+    if not _callbacks:
+        yield None
+        return
+
+    record = {"result": result, "phase": phase, **info}
+    record["pid"] = os.getpid()
+    record["started"] = datetime.datetime.now().isoformat(timespec="seconds")
+
+    # phases may be nested, in which case the outer one owns the tracing
+    trace = _trace_memory and not tracemalloc.is_tracing()
+    if trace:
+        tracemalloc.start()
+    if tracemalloc.is_tracing():
+        start_memory = tracemalloc.get_traced_memory()[0]
+
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        yield record
+    except Exception as ex:
+        record["error"] = f"{type(ex).__name__}: {ex}"
+        raise
+    finally:
+        record["wall_s"] = time.perf_counter() - start_wall
+        record["cpu_s"] = time.process_time() - start_cpu
+        if tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1] - start_memory
+            record["peak_mb"] = max(peak, 0) / 2**20
+        else:
+            record["peak_mb"] = None
+        if trace:
+            tracemalloc.stop()
+
+        logger.debug(f"Measured {record}")
+        _emit(record)
+
+
+def _emit(record: Record) -> None:
+    for callback in list(_callbacks):
+        try:
+            callback(record)
+        except Exception:
+            # instrumentation never fails the extraction
+            logger.exception(f"Instrumentation callback {callback} failed")
+
+
+class JsonLinesSink:
+    """Callback appending each record as a line of JSON
+
+    Fields (ie. the run name) are added to every record. The file is opened
+    per record, so processes can share one file.
+    """
+
+    def __init__(self, path: str | Path, **fields):
+        self.path = Path(path)
+        self.fields = fields
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return f"JsonLinesSink to {self.path}"
+
+    def __call__(self, record: Record) -> None:
+        line = json.dumps({**self.fields, **record}, default=str)
+        with open(self.path, "a") as f:
+            f.write(f"{line}\n")
+
+
+def read_records(path: str | Path) -> pd.DataFrame:
+    """Reads records written by a JsonLinesSink to a dataframe"""
+    return pd.read_json(path, lines=True)
@@ -0,0 +1,137 @@
+"""Out-of-core time series backed by chunked dask arrays
+
+load_network(path, lazy=True) opens the netCDF time series as LazyFrames,
+rather than reading them into memory. A LazyFrame supports the part of the
+DataFrame API extractors use on time series: slicing rows of a period (see
+ResultsExtractor.get_series), selecting columns, elementwise abs and astype,
+and max or sum reductions. These build lazy graphs, and only their (small)
+results are computed.
+
+Reductions through pypsadr.aggregate compute a chunk of columns at a time, so
+at most a few chunks are in memory at once, whatever the network size.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from typing import Any, Optional, TYPE_CHECKING
+
+from .constants import CHUNK_BYTES
+
+if TYPE_CHECKING:
+    import dask.array as da
+    import xarray as xr
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LazyFrame:
+    """Snapshots x components block held as a dask array"""
+
+    def __init__(self, data: da.Array, index: pd.Index, columns: pd.Index):
+        self.data = data
+        self.index = index
+        self.columns = columns
+
+    def __repr__(self) -> str:
+        return (
+            f"LazyFrame of {len(self.index)} snapshots x {len(self.columns)} "
+            f"{self.columns.name} in {self.data.numblocks[1]} chunks"
+        )
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return (len(self.index), len(self.columns))
+
+    @property
+    def dtypes(self) -> pd.Series:
+        return pd.Series(self.data.dtype, index=self.columns)
+
+    @property
+    def empty(self) -> bool:
+        return 0 in self.shape
+
+    @property
+    def iloc(self) -> _ILocIndexer:
+        return _ILocIndexer(self)
+
+    def __getitem__(self, columns: Any) -> LazyFrame:
+        columns = pd.Index(columns)
+        positions = self.columns.get_indexer(columns)
+        if (positions < 0).any():
+            missing = columns[positions < 0].to_list()
+            raise KeyError(f"Columns {missing} are not in the frame")
+        return self._take(slice(None), positions)
+
+    def _take(self, rows: Any, columns: Any) -> LazyFrame:
+        return LazyFrame(
+            self.data[rows][:, columns], self.index[rows], self.columns[columns]
+        )
+
+    def abs(self) -> LazyFrame:
+        return LazyFrame(abs(self.data), self.index, self.columns)
+
+    def astype(self, dtype: Any) -> LazyFrame:
+        return LazyFrame(self.data.astype(dtype), self.index, self.columns)
+
+    def max(self, axis: int = 0) -> pd.Series:
+        """Maximum skipping NaNs, as DataFrame.max"""
+        return self._reduce("nanmax", axis)
+
+    def sum(self, axis: int = 0) -> pd.Series:
+        """Sum skipping NaNs, as DataFrame.sum"""
+        return self._reduce("nansum", axis)
+
+    def _reduce(self, how: str, axis: int) -> pd.Series:
+        import dask.array as da
+
+        values = getattr(da, how)(self.data, axis=axis).compute()
+        return pd.Series(values, index=self.columns if axis == 0 else self.index)
+
+    def to_numpy(self, dtype: Any = None) -> np.ndarray:
+        values = self.data.compute()
+        return values if dtype is None else values.astype(dtype, copy=False)
+
+    def compute(self) -> pd.DataFrame:
+        """Materializes the block as a DataFrame"""
+        return pd.DataFrame(self.to_numpy(), index=self.index, columns=self.columns)
+
+
+class _ILocIndexer:
+    """Positional indexing of rows, or rows and columns, of a LazyFrame"""
+
+    def __init__(self, frame: LazyFrame):
+        self.frame = frame
+
+    def __getitem__(self, key: Any) -> LazyFrame:
+        if isinstance(key, tuple):
+            rows, columns = key
+        else:
+            rows, columns = key, slice(None)
+        return self.frame._take(rows, columns)
+
+
+def read_lazy_series(
+    ds: xr.Dataset,
+    var: str,
+    snapshots: pd.Index,
+    columns: pd.Index,
+    dtype: Optional[str] = None,
+) -> LazyFrame:
+    """Wraps a netCDF variable as a LazyFrame, chunked on components
+
+    Chunks hold every snapshot of as many components as fit in CHUNK_BYTES.
+    """
+
+    array = ds[var]
+    size = max(1, CHUNK_BYTES // max(array.dtype.itemsize * len(snapshots), 1))
+    data = array.chunk({array.dims[0]: -1, array.dims[1]: size}).data
+    if dtype and data.dtype == "float64":
+        data = data.astype(dtype)
+    return LazyFrame(data, snapshots, columns)
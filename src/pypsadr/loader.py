@@ -0,0 +1,319 @@
+"""Selective loading of PyPSA netCDF networks
+
+Only the variables declared by the requested extractors are read from disk,
+and are held in a lightweight NetworkData object rather than a full
+pypsa.Network.
+
+Time series can be held in reduced precision (ie. float32) to halve their
+memory. Extractors accumulate them in float64, see pypsadr.aggregate. They
+can also be left on disk, and read a chunk at a time, see pypsadr.lazy.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+
+from .constants import CHUNK_BYTES, COMPONENT_LIST_NAMES
+
+if TYPE_CHECKING:
+    import pypsa
+    import xarray as xr
+    from .lazy import LazyFrame
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Defaults of static attributes that PyPSA does not write when left untouched
+STATIC_DEFAULTS = {
+    "bus": "",
+    "bus0": "",
+    "bus1": "",
+    "carrier": "",
+    "p_nom": 0.0,
+    "p_nom_opt": 0.0,
+    "e_nom": 0.0,
+    "e_nom_opt": 0.0,
+    "max_hours": 1.0,
+    "capital_cost": 0.0,
+    "marginal_cost": 0.0,
+    "marginal_cost_storage": 0.0,
+    "build_year": 0,
+    "lifetime": float("inf"),
+}
+
+SNAPSHOT_WEIGHTINGS = ["objective", "stores", "generators"]
+PERIOD_WEIGHTINGS = ["objective", "years"]
+
+COMPONENT_NAMES = {y: x for x, y in COMPONENT_LIST_NAMES.items()}
+
+
+class NetworkData:
+    """Lightweight stand-in for pypsa.Network
+
+    Exposes the same attribute names extractors use (`n.links`,
+    `n.links_t["p0"]`, `n.snapshot_weightings`, etc.), but only holds the
+    tables that were loaded.
+    """
+
+    def __init__(
+        self,
+        static: dict[str, pd.DataFrame],
+        dynamic: dict[str, dict[str, pd.DataFrame]],
+        snapshot_weightings: pd.DataFrame,
+        objective: float = float("nan"),
+        name: str = "",
+        investment_period_weightings: Optional[pd.DataFrame] = None,
+    ):
+        self._static = static
+        self._dynamic = dynamic
+        self.snapshot_weightings = snapshot_weightings
+        self.objective = objective
+        self.name = name
+        if investment_period_weightings is None:
+            investment_period_weightings = pd.DataFrame(
+                1.0, index=self.investment_periods, columns=PERIOD_WEIGHTINGS
+            )
+        self.investment_period_weightings = investment_period_weightings
+
+    def __repr__(self) -> str:
+        return f"NetworkData '{self.name}' with {list(self._static)}"
+
+    def downcast(self, dtype: str = "float32") -> None:
+        """Holds float64 time series in dtype, converting each on first access
+
+        Applies in place, so the float64 frames are released once converted.
+        """
+        for list_name, attrs in self._dynamic.items():
+            self._dynamic[list_name] = _DowncastSeries(attrs, dtype)
+
+    def __getattr__(self, attr: str):
+        # only called when normal lookup fails
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        if attr.endswith("_t") and attr[:-2] in self._dynamic:
+            return self._dynamic[attr[:-2]]
+        if attr in self._static:
+            return self._static[attr]
+        raise AttributeError(
+            f"'{attr}' was not loaded. Loaded components are {list(self._static)}"
+        )
+
+    @property
+    def snapshots(self) -> pd.Index:
+        return self.snapshot_weightings.index
+
+    @property
+    def investment_periods(self) -> pd.Index:
+        if isinstance(self.snapshots, pd.MultiIndex):
+            return self.snapshots.unique(level=0)
+        return pd.Index([])
+
+
+class _DowncastSeries(dict):
+    """Time series of a component, downcast to dtype on first access"""
+
+    def __init__(self, attrs: dict[str, pd.DataFrame], dtype: str):
+        super().__init__(attrs)
+        self.dtype = dtype
+
+    def __getitem__(self, attr: str) -> pd.DataFrame:
+        df = super().__getitem__(attr)
+        if len(df.columns) and (df.dtypes == "float64").all():
+            df = df.astype(self.dtype)
+            super().__setitem__(attr, df)
+        return df
+
+
+def get_required_variables(
+    results: Optional[list[str]] = None,
+) -> Optional[dict[str, set[str]]]:
+    """Gets network variables read by the extractors of the requested results
+
+    Returns None if any extractor needs a full pypsa.Network.
+    """
+    from .registry import EXTRACTORS, get_variables
+
+    return get_variables(results or list(EXTRACTORS))
+
+
+def load_network(
+    path: str | Path,
+    results: Optional[list[str]] = None,
+    dtype: Optional[str] = None,
+    lazy: bool = False,
+) -> NetworkData | pypsa.Network:
+    """Loads only what is needed to extract the requested results
+
+    Path can be a netCDF file or a columnar cache directory. For netCDF, falls
+    back to reading a full pypsa.Network when an extractor does not declare
+    its variables. If dtype is given (ie. "float32"), time series are held in
+    it, being converted as read from netCDF, or on first access from a
+    columnar cache. Full networks are always float64.
+
+    If lazy, netCDF time series are opened as chunked dask arrays rather than
+    read, and only reduced a chunk at a time (see pypsadr.lazy). Columnar
+    caches are memory mapped, so are out of core either way.
+    """
+
+    from .columnar import is_columnar, open_columnar
+
+    if is_columnar(path):
+        n = open_columnar(path, results)
+        if dtype:
+            n.downcast(dtype)
+        return n
+
+    variables = get_required_variables(results)
+
+    if variables is None:
+        import pypsa
+
+        if dtype:
+            logger.warning(f"Time series of full networks are not held in {dtype}")
+        if lazy:
+            logger.warning("Full networks are read into memory")
+        return pypsa.Network(str(path))
+
+    import xarray as xr
+
+    if lazy:
+        try:
+            import dask  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "Lazy loading requires dask, installed with the 'lazy' extra"
+            ) from e
+
+        # left open, as time series are read from it on demand
+        logger.info(f"Opening {variables} from {path}")
+        return _read_network_data(xr.open_dataset(path), variables, dtype, lazy)
+
+    logger.info(f"Reading {variables} from {path}")
+
+    with xr.open_dataset(path) as ds:
+        return _read_network_data(ds, variables, dtype)
+
+
+def _read_network_data(
+    ds: xr.Dataset,
+    variables: dict[str, set[str]],
+    dtype: Optional[str] = None,
+    lazy: bool = False,
+) -> NetworkData:
+    snapshot_weightings = _read_snapshot_weightings(ds)
+
+    static = {}
+    dynamic = {}
+    for component, attrs in variables.items():
+        if component.endswith("_t"):
+            list_name = component[:-2]
+            dynamic[list_name] = {
+                attr: _read_series(
+                    ds, list_name, attr, snapshot_weightings.index, dtype, lazy
+                )
+                for attr in attrs
+            }
+        else:
+            static[component] = _read_static(ds, component, attrs)
+
+    # time series components always have a static table for their index
+    for list_name in dynamic:
+        if list_name not in static:
+            static[list_name] = _read_static(ds, list_name, [])
+
+    attrs = ds.attrs
+    objective = attrs.get("network_objective", attrs.get("network__objective"))
+
+    return NetworkData(
+        static=static,
+        dynamic=dynamic,
+        snapshot_weightings=snapshot_weightings,
+        objective=float("nan") if objective is None else float(objective),
+        name=attrs.get("network_name", ""),
+        investment_period_weightings=_read_period_weightings(ds),
+    )
+
+
+def _read_snapshot_weightings(ds: xr.Dataset) -> pd.DataFrame:
+    if "snapshots_period" in ds and "snapshots_timestep" in ds:
+        index = pd.MultiIndex.from_arrays(
+            [ds["snapshots_period"].values, ds["snapshots_timestep"].values],
+            names=["period", "timestep"],
+        )
+    else:
+        index = ds.indexes["snapshots"].rename("snapshot")
+
+    weightings = pd.DataFrame(index=index)
+    for col in SNAPSHOT_WEIGHTINGS:
+        var = f"snapshots_{col}"
+        weightings[col] = ds[var].values if var in ds else 1.0
+    return weightings
+
+
+def _read_period_weightings(ds: xr.Dataset) -> Optional[pd.DataFrame]:
+    if "investment_periods" not in ds.coords:
+        return None
+
+    index = ds.indexes["investment_periods"].rename("period")
+    weightings = pd.DataFrame(index=index)
+    for col in PERIOD_WEIGHTINGS:
+        var = f"investment_periods_{col}"
+        weightings[col] = ds[var].values if var in ds else 1.0
+    return weightings
+
+
+def _read_static(ds: xr.Dataset, list_name: str, attrs: set[str]) -> pd.DataFrame:
+    index_name = f"{list_name}_i"
+    if index_name in ds.coords:
+        index = ds.indexes[index_name].astype(str)
+    else:
+        index = pd.Index([], dtype=str)
+    index = index.rename(COMPONENT_NAMES.get(list_name, list_name))
+
+    df = pd.DataFrame(index=index)
+    for attr in sorted(attrs):
+        var = f"{list_name}_{attr}"
+        if var in ds:
+            df[attr] = ds[var].values
+        else:
+            df[attr] = STATIC_DEFAULTS.get(attr)
+    return df
+
+
+def _read_series(
+    ds: xr.Dataset,
+    list_name: str,
+    attr: str,
+    snapshots: pd.Index,
+    dtype: Optional[str] = None,
+    lazy: bool = False,
+) -> pd.DataFrame | LazyFrame:
+    var = f"{list_name}_t_{attr}"
+    if var not in ds:
+        return pd.DataFrame(index=snapshots)
+    columns = ds.indexes[f"{var}_i"].astype(str)
+    columns = columns.rename(COMPONENT_NAMES.get(list_name, list_name))
+    if lazy:
+        from .lazy import read_lazy_series
+
+        return read_lazy_series(ds, var, snapshots, columns, dtype)
+    if dtype and ds[var].dtype == "float64":
+        values = _read_values(ds[var], dtype)
+    else:
+        values = ds[var].values
+    return pd.DataFrame(values, index=snapshots, columns=columns)
+
+
+def _read_values(da: xr.DataArray, dtype: str) -> np.ndarray:
+    """Reads a snapshots x components variable in chunks of rows, converting
+    each to dtype, so the variable is never held in full as read"""
+
+    values = np.empty(da.shape, dtype=dtype)
+    step = max(1, CHUNK_BYTES // max(da.dtype.itemsize * da.shape[1], 1))
+    for start in range(0, da.shape[0], step):
+        values[start : start + step] = da[start : start + step].values
+    return values
@@ -0,0 +1,42 @@
+"""Opt-in logging configuration
+
+pypsadr only creates loggers. Scripts and notebooks that want the log written
+to file call configure_logging() once at startup.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+import logging
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+def configure_logging(
+    filename: Optional[str | Path] = "logs/pypsadr.log",
+    level: int = logging.DEBUG,
+    filemode: str = "w",
+) -> logging.Handler:
+    """Writes pypsadr logs at or above level to file (or stderr if None)
+
+    The handler is added to the pypsadr logger only, so the root logger and
+    other libraries are left as configured. Returns the handler, so it can be
+    removed again.
+    """
+
+    if filename is None:
+        handler = logging.StreamHandler()
+    else:
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        handler = logging.FileHandler(filename, mode=filemode, encoding="utf-8")
+    handler.setLevel(level)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    logger = logging.getLogger("pypsadr")
+    logger.addHandler(handler)
+    if logger.getEffectiveLevel() > level:
+        logger.setLevel(level)
+
+    return handler
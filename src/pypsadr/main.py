@@ -1,35 +1,22 @@
 from __future__ import annotations
 
-import pypsa
 import pandas as pd
-import matplotlib.pyplot as plt
-from typing import Any, Optional
-
-from pypsadr.extractor import ResultsExtractor
-from pypsadr.generation import Generation
-from pypsadr.peakiness import Peakiness
-from pypsadr.shed_season import ShedSeason
-from pypsadr.shed_days import ShedDays
-from pypsadr.ramping import Ramping
-from pypsadr.shift_season import ShiftSeason
-from pypsadr.capacity import Capacity
-from pypsadr.cost import Cost
-from pypsadr.demand_response import DemandResponse
-from pypsadr.emissions import Emissions
-from pypsadr.net_load import NetLoad
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TYPE_CHECKING
+
+from pypsadr.cache import ResultsCache
+from pypsadr import instrument, registry
+
+# extractors (and pypsa and matplotlib through them) are imported on first use
+if TYPE_CHECKING:
+    import pypsa
+    import matplotlib.pyplot as plt
+    from pypsadr.extractor import ResultsExtractor
+    from pypsadr.loader import NetworkData
 
 import logging
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(
-    filename="logs/pypsadr.log",
-    encoding="utf-8",
-    level=logging.DEBUG,
-    filemode="w",
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
-
-logging.getLogger("pypsa").setLevel(logging.INFO)
 
 NICE_NAMES = {
     "res": "Residential",
@@ -42,30 +29,79 @@ FIGSIZE = (20, 6)
 
 
 class ResultsAccessor:
-    available_results = [
-        # dr specific metrics
-        "peakiness",
-        "ramping",
-        "shed_season",
-        "shed_days",
-        "shift_season",
-        # esm metrics
-        "generation",
-        "capacity",
-        "cost",
-        "dr",
-        "emissions",
-        "net_load",
-    ]
-
-    def __init__(self, n: pypsa.Network, year: Optional[int] = None):
-        self.n = n
+    # results in registry order, see pypsadr.registry
+    available_results = list(registry.EXTRACTORS)
+
+    def __init__(
+        self,
+        n: pypsa.Network | NetworkData,
+        year: Optional[int] = None,
+        reduced_precision: bool = False,
+    ):
+        """Accesses results of a network, starting at year (default first)
+
+        If reduced_precision, time series of a NetworkData are downcast to
+        float32 on first access (in place, see NetworkData.downcast), which
+        about halves their memory. Sums are still accumulated in float64.
+        """
+
+        self._cache = ResultsCache()
+        self._reduced_precision = reduced_precision
+        self._n = n
+        self._downcast()
         if year:
-            self.year = year
+            self._year = year
         else:
-            self.year = self.n.investment_periods[0]
+            self._year = self.n.investment_periods[0]
         logger.info(f"Network {n} initialized to year {self.year}")
 
+    @classmethod
+    def from_columnar(
+        cls,
+        cache_dir: str | Path,
+        year: Optional[int] = None,
+        reduced_precision: bool = False,
+    ) -> ResultsAccessor:
+        """Opens a columnar network cache written by pypsadr.columnar"""
+        from pypsadr.columnar import open_columnar
+
+        return cls(open_columnar(cache_dir), year, reduced_precision)
+
+    @property
+    def n(self) -> pypsa.Network | NetworkData:
+        return self._n
+
+    @n.setter
+    def n(self, n: pypsa.Network | NetworkData) -> None:
+        self._n = n
+        self._cache.clear()
+        self._downcast()
+
+    @property
+    def reduced_precision(self) -> bool:
+        return self._reduced_precision
+
+    def _downcast(self) -> None:
+        if not self._reduced_precision:
+            return
+        if hasattr(self._n, "downcast"):
+            self._n.downcast("float32")
+        else:
+            logger.warning("Reduced precision needs a NetworkData; using float64")
+
+    @property
+    def year(self) -> int:
+        return self._year
+
+    @year.setter
+    def year(self, year: int) -> None:
+        # intermediates are computed over all periods, so are kept
+        self._year = year
+
+    @property
+    def periods(self) -> list[int]:
+        return list(self.n.investment_periods)
+
     def __iter__(self):
         for x in self.available_results:
             yield x
@@ -76,43 +112,160 @@ class ResultsAccessor:
                 f"{input} is not valid. Accepted inputs are {self.available_results}"
             )
 
-    def _get_extractor(self, input: str) -> ResultsExtractor:
+    @classmethod
+    def _get_extractor_class(cls, input: str) -> type[ResultsExtractor]:
+        return registry.get_extractor_class(input)
+
+    def _get_extractor(
+        self,
+        input: str,
+        year: Optional[int] = None,
+        periods: Optional[tuple[int, ...]] = None,
+    ) -> ResultsExtractor:
+        """Creates the extractor of input, with intermediates computed over the
+        periods (default the year only)"""
         self._is_valid_input(input)
 
-        if input == "peakiness":
-            return Peakiness(self.n, self.year)
-        elif input == "ramping":
-            return Ramping(self.n, self.year)
-        elif input == "shed_season":
-            return ShedSeason(self.n, self.year)
-        elif input == "shed_days":
-            return ShedDays(self.n, self.year)
-        elif input == "shift_season":
-            return ShiftSeason(self.n, self.year)
-        elif input == "generation":
-            return Generation(self.n, self.year)
-        elif input == "capacity":
-            return Capacity(self.n)
-        elif input == "cost":
-            return Cost(self.n, self.year)
-        elif input == "dr":
-            return DemandResponse(self.n, self.year)
-        elif input == "emissions":
-            return Emissions(self.n, self.year)
-        elif input == "net_load":
-            return NetLoad(self.n, self.year)
-        else:
-            raise NotImplementedError
+        extractor = self._get_extractor_class(input)
+        year = year if year else self.year
+        return extractor(self.n, year, self._cache, periods)
+
+    def iter_extractors(
+        self, results: Optional[list[str]] = None, year: Optional[int] = None
+    ) -> Iterator[tuple[str, ResultsExtractor]]:
+        """Yields the extractor of each result, scheduling shared intermediates
+
+        Results are yielded in registry order. Intermediates are computed once,
+        in dependency order, before the first result needing them, and are
+        released from the cache when the caller moves past the last result
+        needing them, which bounds peak memory.
+        """
+
+        results = results or self.available_results
+        for result in results:
+            self._is_valid_input(result)
+
+        from pypsadr.extractor import IntermediateExtractor
+
+        year = year if year else self.year
+
+        # over the year only, same as the extractors yielded
+        intermediates = IntermediateExtractor(self.n, year, self._cache)
+
+        for action, name in registry.get_schedule(results):
+            if action == registry.COMPUTE:
+                with instrument.measure(None, "intermediate", intermediate=name):
+                    intermediates.get_intermediate(name)
+            elif action == registry.EXTRACT:
+                with instrument.measure(name, "build", year=int(year)):
+                    extractor = self._get_extractor(name, year)
+                yield name, extractor
+            elif action == registry.RELEASE:
+                self._cache.release(name)
+
+    def _measure(self, input: str, phase: str, extractor: ResultsExtractor):
+        year = extractor.year
+        return instrument.measure(
+            input,
+            phase,
+            extractor=type(extractor).__name__,
+            year=None if year is None else int(year),
+            network=getattr(self.n, "name", ""),
+        )
 
     def get_dataframe(self, input: str) -> pd.DataFrame:
         extractor = self._get_extractor(input)
-        return extractor.extract_dataframe()
+        with self._measure(input, "dataframe", extractor):
+            return extractor.extract_dataframe()
 
     def get_datapoint(self, input: str, as_df: Optional[bool] = False) -> Any:
         logger.debug(f"Datapoint arguments are: input={input} | as_df={as_df}")
 
         extractor = self._get_extractor(input)
-        return extractor.extract_datapoint(as_df=as_df)
+        with self._measure(input, "datapoint", extractor):
+            return extractor.extract_datapoint(as_df=as_df)
+
+    def get_dataframes(self, input: str) -> dict[int, pd.DataFrame]:
+        """Gets the dataframe of every investment period
+
+        Intermediates (net load, ramping, peaks, seasons) are computed once
+        over all periods and shared, rather than once per period.
+        """
+        dfs = {}
+        for period in self.periods:
+            extractor = self._get_extractor(input, period, tuple(self.periods))
+            with self._measure(input, "dataframe", extractor):
+                dfs[period] = extractor.extract_dataframe()
+        return dfs
+
+    def get_datapoints(
+        self, input: str, as_df: Optional[bool] = False
+    ) -> dict[int, Any]:
+        """Gets the datapoint of every investment period"""
+        logger.debug(f"Datapoints arguments are: input={input} | as_df={as_df}")
+
+        datapoints = {}
+        for period in self.periods:
+            extractor = self._get_extractor(input, period, tuple(self.periods))
+            with self._measure(input, "datapoint", extractor):
+                datapoints[period] = extractor.extract_datapoint(as_df=as_df)
+        return datapoints
+
+    def extract_all(
+        self,
+        results: Optional[list[str]] = None,
+        dataframes: bool = True,
+        datapoints: bool = True,
+        plot: Optional[Callable[[str, plt.figure], None]] = None,
+        year: Optional[int] = None,
+        on_extracted: Optional[
+            Callable[[str, Optional[pd.DataFrame], Optional[pd.DataFrame]], None]
+        ] = None,
+    ) -> tuple[pd.DataFrame, dict[str, pd.DataFrame]]:
+        """Extracts datapoints and dataframes of many results at once
+
+        Each extractor is built once and used for all of its outputs, with
+        intermediates scheduled as in iter_extractors. If plot is given, it is
+        called with the figure of each result (ie. to save it), which is built
+        by the same extractor. If on_extracted is given, it is called with each
+        result, its long datapoint and its dataframe (None if not extracted)
+        once all of its outputs are done (ie. to write them).
+
+        Returns datapoints in long format (result, metric, value), in the order
+        of results, and dataframes keyed on result.
+        """
+
+        results = results or self.available_results
+
+        dps = {}
+        dfs = {}
+        for result, extractor in self.iter_extractors(results, year):
+            if datapoints:
+                with self._measure(result, "datapoint", extractor):
+                    dp = extractor.extract_datapoint(as_df=True)
+                dps[result] = pd.DataFrame(
+                    {
+                        "result": result,
+                        "metric": dp.iloc[:, 0].reset_index(drop=True),
+                        "value": dp["value"].reset_index(drop=True),
+                    }
+                )
+            if dataframes:
+                with self._measure(result, "dataframe", extractor):
+                    dfs[result] = extractor.extract_dataframe()
+            if plot:
+                with self._measure(result, "plot", extractor):
+                    fig, _ = extractor.plot(figsize=FIGSIZE, fontsize=FONTSIZE)
+                plot(result, fig)
+            if on_extracted:
+                on_extracted(result, dps.get(result), dfs.get(result))
+
+        order = [x for x in results if x in dps]
+        if order:
+            long = pd.concat([dps[x] for x in order], ignore_index=True)
+        else:
+            long = pd.DataFrame(columns=["result", "metric", "value"])
+        return long, {x: dfs[x] for x in results if x in dfs}
 
     def plot(self, input: str, **kwargs) -> tuple[plt.figure, plt.axes]:
         extractor = self._get_extractor(input)
@@ -120,10 +273,17 @@ class ResultsAccessor:
         fontsize = kwargs.get("fontsize", FONTSIZE)
         figsize = kwargs.get("figsize", FIGSIZE)
 
-        return extractor.plot(figsize=figsize, fontsize=fontsize, **kwargs)
+        with self._measure(input, "plot", extractor):
+            return extractor.plot(figsize=figsize, fontsize=fontsize, **kwargs)
 
 
 if __name__ == "__main__":
+    import pypsa
+
+    from pypsadr.log import configure_logging
+
+    configure_logging()
+
     network = "./data/caiso/raw/mgas/networks/elec_s80_c4m_ec_lv1.0_1h-TCT_E-G.nc"
 
     n = pypsa.Network(network)
@@ -0,0 +1,146 @@
+"""Manifest of results extracted from a network
+
+Each output directory holds a manifest recording the source network (size,
+modification time and content hash), the pypsadr and results store versions
+and the results and plots written so far. Reruns use it to skip work that is
+up to date.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Optional
+
+from .store import STORE_VERSION
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+HASH_CHUNK_SIZE = 2**24  # 16 MB
+
+
+def get_version() -> str:
+    try:
+        return version("pypsadr")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def get_file_hash(path: str | Path) -> str:
+    """Gets sha256 of a file, read in chunks"""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def get_source_info(network: str | Path, hash: Optional[bool] = True) -> dict:
+    stat = Path(network).stat()
+    info = {
+        "path": str(network),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+    if hash:
+        info["sha256"] = get_file_hash(network)
+    return info
+
+
+def read_manifest(save_dir: str | Path) -> Optional[dict[str, Any]]:
+    p = Path(save_dir, MANIFEST_NAME)
+    if not p.exists():
+        return None
+    try:
+        with open(p) as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        logger.warning(f"Ignoring unreadable manifest {p}")
+        return None
+
+
+def write_manifest(save_dir: str | Path, manifest: dict[str, Any]) -> None:
+    """Writes the manifest atomically so an interruption never corrupts it"""
+    p = Path(save_dir, MANIFEST_NAME)
+    tmp = p.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, p)
+
+
+def start_manifest(save_dir: str | Path, network: str | Path) -> dict[str, Any]:
+    """Writes a new manifest with no results for the network"""
+    manifest = {
+        "source": get_source_info(network),
+        "pypsadr_version": get_version(),
+        "store_version": STORE_VERSION,
+        "results": [],
+        "plots": [],
+    }
+    write_manifest(save_dir, manifest)
+    return manifest
+
+
+def add_result(save_dir: str | Path, result: str, kind: str = "results") -> None:
+    """Records a result (or its plot, if kind is "plots") as written"""
+    manifest = read_manifest(save_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No manifest in {save_dir}")
+    written = manifest.setdefault(kind, [])
+    if result not in written:
+        written.append(result)
+    write_manifest(save_dir, manifest)
+
+
+def is_current(save_dir: str | Path, network: str | Path) -> bool:
+    """Checks the manifest was written from this network and pypsadr version"""
+
+    manifest = read_manifest(save_dir)
+    if manifest is None:
+        return False
+
+    if manifest.get("pypsadr_version") != get_version():
+        logger.info(f"{save_dir} was written by another pypsadr version")
+        return False
+
+    recorded = manifest["source"]
+    current = get_source_info(network, hash=False)
+
+    if recorded["size"] != current["size"]:
+        return False
+    if recorded["mtime_ns"] == current["mtime_ns"]:
+        return True
+
+    # touched but possibly unchanged, so fall back to the content hash
+    if get_file_hash(network) != recorded.get("sha256"):
+        return False
+    manifest["source"].update(current)
+    write_manifest(save_dir, manifest)
+    return True
+
+
+def get_stale_results(
+    save_dir: str | Path, network: str | Path, results: list[str], kind: str = "results"
+) -> list[str]:
+    """Gets results (or plots, if kind is "plots") missing or out of date
+
+    Results recorded for another version of the results store are out of date,
+    as the store no longer holds them in the recorded format.
+    """
+
+    if not is_current(save_dir, network):
+        return list(results)
+
+    manifest = read_manifest(save_dir)
+    if kind == "results" and manifest.get("store_version") != STORE_VERSION:
+        logger.info(f"{save_dir} results were written to another store version")
+        return list(results)
+
+    done = set(manifest.get(kind, []))
+    return [x for x in results if x not in done]
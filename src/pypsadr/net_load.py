@@ -1,9 +1,13 @@
 from __future__ import annotations
 
 import pandas as pd
-import matplotlib.pyplot as plt
+from typing import TYPE_CHECKING
 
 from .extractor import ResultsExtractor
+from .plotting import MAX_POINTS, plot_decimated
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
 
 import logging
 
@@ -11,8 +15,8 @@ logger = logging.getLogger(__name__)
 
 
 class NetLoad(ResultsExtractor):
-    def __init__(self, n, year=None):
-        super().__init__(n, year)
+    def __init__(self, n, year=None, cache=None, periods=None):
+        super().__init__(n, year, cache, periods)
         self.net_load = self.get_net_load(sorted=False)
         
     def extract_dataframe(self) -> pd.DataFrame:
@@ -23,16 +27,18 @@ class NetLoad(ResultsExtractor):
         return total_net_load.to_frame(name="value").reset_index(names="metric")
 
     def plot(self, save=None, **kwargs) -> tuple[plt.figure, plt.axes]:
+        import matplotlib.pyplot as plt
         
         figsize = (10, 6)
+        max_points = kwargs.get("max_points", MAX_POINTS)
         
         net_load = self.net_load.set_index("timestep")["Net_Load_MW"]
         sorted_net_load = net_load.reset_index(drop=True).sort_values(ascending=False).reset_index(drop=True)
         
         fig, ax = plt.subplots(figsize=figsize, nrows=2, ncols=1)
         
-        net_load.plot(ax=ax[0], xlabel="", ylabel="Net Load (MW)")
-        sorted_net_load.plot(ax=ax[1])
+        plot_decimated(net_load, ax[0], max_points, xlabel="", ylabel="Net Load (MW)")
+        plot_decimated(sorted_net_load, ax[1], max_points)
         
         ax[0].set_title("Net Load")
         ax[0].set_ylabel("Net Load (MW)")
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import pandas as pd
-import matplotlib.pyplot as plt
 from typing import Optional
 from datetime import datetime
 from .extractor import ResultsExtractor
+from .plotting import MAX_POINTS, plot_decimated
 
 import logging
 
@@ -12,12 +12,12 @@ logger = logging.getLogger(__name__)
 
 
 class Peakiness(ResultsExtractor):
-    def __init__(self, n, year=None):
-        super().__init__(n, year)
-        self.net_load = self.get_net_load(sorted=True)
+    def __init__(self, n, year=None, cache=None, periods=None):
+        super().__init__(n, year, cache, periods)
+        self.net_load = self.get_net_load_peaks(100)
 
     def extract_dataframe(self) -> pd.DataFrame:
-        return self.net_load.set_index("timestep")
+        return self.get_net_load(sorted=True).set_index("timestep")
 
     def extract_datapoint(
         self, value: Optional[str] = None, as_df: Optional[bool] = False
@@ -52,6 +52,8 @@ class Peakiness(ResultsExtractor):
             return peakiness
 
     def plot(self, save: Optional[str] = None, **kwargs):
+        import matplotlib.pyplot as plt
+
         fontsize = kwargs.get("fontsize", 12)
         figsize = kwargs.get("figsize", (20, 6))
 
@@ -70,7 +72,15 @@ class Peakiness(ResultsExtractor):
 
         fig, ax = plt.subplots(figsize=figsize)
 
-        df.plot(ax=ax, xlabel="", color=["tab:blue", "tab:red", "tab:red"])
+        plot_decimated(
+            df,
+            ax,
+            kwargs.get("max_points", MAX_POINTS),
+            by="Net Load",
+            keep=[date_0],
+            xlabel="",
+            color=["tab:blue", "tab:red", "tab:red"],
+        )
 
         for line in ax.lines:
             if line.get_label() == "Net Load":
@@ -0,0 +1,146 @@
+"""Decimation of long time series for plotting
+
+Hourly series of a year have far more points than a figure has pixels. They
+are decimated with Largest-Triangle-Three-Buckets (LTTB), which keeps the
+points that most change the shape of the line, rather than every n-th point.
+The maximum and minimum, and any given points (ie. ones annotated), are
+always kept.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# points kept of a decimated series, a few per pixel of a 400 dpi figure
+MAX_POINTS = 2000
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Gets positions of the n_out points kept by LTTB, in order
+
+    The first and last points are always kept. Interior points are split in
+    n_out - 2 buckets, each keeping the point forming the largest triangle
+    with the point kept before and the mean of the next bucket.
+    """
+
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    # means of each bucket, and of the last point, skipping NaNs
+    finite = ~np.isnan(y)
+    starts = np.append(edges[:-1], n - 1)
+    counts = np.add.reduceat(finite, starts)
+    mean_x = np.add.reduceat(x, starts) / np.diff(np.append(starts, n))
+    mean_y = np.add.reduceat(np.where(finite, y, 0), starts) / np.maximum(counts, 1)
+
+    kept = np.empty(n_out, dtype=int)
+    kept[0] = 0
+    kept[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - mean_x[i + 1]) * (y[start:stop] - y[a])
+            - (x[a] - x[start:stop]) * (mean_y[i + 1] - y[a])
+        )
+        # NaN areas (of NaN values) are never kept, unless all are
+        a = start + int(np.argmax(np.where(np.isnan(area), -1, area)))
+        kept[i + 1] = a
+
+    return kept
+
+
+def decimate(
+    df: pd.Series | pd.DataFrame,
+    max_points: Optional[int] = MAX_POINTS,
+    by: Optional[str] = None,
+    keep: Optional[list] = None,
+) -> pd.Series | pd.DataFrame:
+    """Gets the rows of a series (or frame) kept for plotting
+
+    Rows are chosen with LTTB on the values of the series (or column by of a
+    frame, default all columns), against the index if it is datetime or
+    numeric. The maximum and minimum of each column, and rows with an index
+    label in keep, are also kept. Returned as is if max_points is None or not
+    exceeded.
+    """
+
+    if max_points is None or len(df) <= max_points:
+        return df
+
+    if isinstance(df.index, pd.DatetimeIndex):
+        x = df.index.asi8
+    elif pd.api.types.is_numeric_dtype(df.index):
+        x = df.index.to_numpy()
+    else:
+        x = np.arange(len(df))
+
+    if isinstance(df, pd.Series):
+        columns = [df]
+    elif by is not None:
+        columns = [df[by]]
+    else:
+        columns = [df[col] for col in df.columns]
+
+    positions = []
+    for column in columns:
+        values = column.to_numpy(dtype=float)
+        positions.append(lttb(x, values, max_points))
+        if not np.isnan(values).all():
+            positions.append([np.nanargmax(values), np.nanargmin(values)])
+
+    if keep is not None:
+        kept = df.index.get_indexer(pd.Index(keep))
+        positions.append(kept[kept >= 0])
+
+    positions = np.unique(np.concatenate(positions))
+    logger.debug(f"Decimated {len(df)} points to {len(positions)}")
+    return df.iloc[positions]
+
+
+def plot_decimated(
+    df: pd.Series | pd.DataFrame,
+    ax: plt.Axes,
+    max_points: Optional[int] = MAX_POINTS,
+    by: Optional[str] = None,
+    keep: Optional[list] = None,
+    **kwargs,
+) -> plt.Axes:
+    """Plots a decimated series (or frame) on ax, passing kwargs to df.plot
+
+    Dates are plotted in matplotlib units (rather than pandas periods, which
+    need a regular index), so other artists can be added with datetimes.
+    Months are ticked, and limits set to the first and last dates, as pandas
+    does for hourly series. Dates are sorted first, as LTTB needs them in
+    order.
+    """
+
+    if not isinstance(df.index, pd.DatetimeIndex):
+        return decimate(df, max_points, by, keep).plot(ax=ax, **kwargs)
+
+    import matplotlib.dates as mdates
+
+    df = df.sort_index()
+    decimated = decimate(df, max_points, by, keep)
+    ax = decimated.plot(ax=ax, x_compat=True, rot=0, **kwargs)
+    locator = mdates.MonthLocator()
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+    ax.set_xlim(df.index[0], df.index[-1])
+    return ax
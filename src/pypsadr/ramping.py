@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import pandas as pd
-import matplotlib.pyplot as plt
 from typing import Optional
 from datetime import datetime
 from .extractor import ResultsExtractor
@@ -12,12 +11,12 @@ logger = logging.getLogger(__name__)
 
 
 class Ramping(ResultsExtractor):
-    def __init__(self, n, year=None):
-        super().__init__(n, year)
-        self.ramp_ts = self.get_daily_max_ramp()
+    def __init__(self, n, year=None, cache=None, periods=None):
+        super().__init__(n, year, cache, periods)
+        self.ramp_ts = self.get_daily_ramp_peaks(25)
 
     def extract_dataframe(self) -> pd.DataFrame:
-        return self.ramp_ts.set_index("timestep")
+        return self.get_daily_max_ramp().set_index("timestep")
 
     def extract_datapoint(
         self, value: Optional[str] = None, as_df: Optional[bool] = False
@@ -49,10 +48,12 @@ class Ramping(ResultsExtractor):
             return extreme
 
     def plot(self, save: Optional[str] = None, **kwargs):
+        import matplotlib.pyplot as plt
+
         fontsize = kwargs.get("fontsize", 12)
         figsize = kwargs.get("figsize", (20, 6))
 
-        ramp_daily_ts = self.ramp_ts.sort_values(by="timestep").copy()
+        ramp_daily_ts = self.get_daily_max_ramp().sort_values(by="timestep")
         ramp_max = ramp_daily_ts.at[0, "Absolute 3-hr Ramping"]
         ramp_rountine = ramp_daily_ts.at[24, "Absolute 3-hr Ramping"]
 
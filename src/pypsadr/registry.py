@@ -0,0 +1,383 @@
+"""Declarative registry of extractors and the intermediates they share
+
+Each result is declared with the extractor class that computes it (as
+"module:Class", imported on first use), the shared intermediates it consumes,
+and the network variables it reads directly. Intermediates declare what they
+require and read in turn, so the variables and intermediates of any set of
+results are known without importing an extractor.
+
+Intermediates are cached in the ResultsCache under a tuple starting with their
+name and ending with the periods they cover (see
+ResultsExtractor.get_intermediate). Those with a
+method are computed by the named method of their owning extractor; the rest
+are derived on demand by the consumers.
+
+A schedule of results computes each intermediate once, in dependency order,
+just before the first result that needs it, and releases it once the last
+result needing it is extracted.
+"""
+
+from __future__ import annotations
+
+import importlib
+from graphlib import TopologicalSorter
+from typing import Any, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pypsa
+    from .cache import ResultsCache
+    from .extractor import ResultsExtractor
+    from .loader import NetworkData
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+COMPUTE = "compute"
+EXTRACT = "extract"
+RELEASE = "release"
+
+
+class Intermediate:
+    """Shared intermediate of extractors
+
+    Computed by method of the owner (a result name, or the base extractor if
+    None), or derived on demand by consumers if method is None.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        method: Optional[str] = None,
+        owner: Optional[str] = None,
+        requires: tuple[str, ...] = (),
+        variables: Optional[dict[str, list[str]]] = None,
+    ):
+        self.name = name
+        self.method = method
+        self.owner = owner
+        self.requires = requires
+        self.variables = variables or {}
+
+    def __repr__(self) -> str:
+        return f"Intermediate '{self.name}' requiring {list(self.requires)}"
+
+
+class ExtractorEntry:
+    """Result computed by an extractor class
+
+    Variables are the network variables read directly (not through
+    intermediates). None means a full pypsa.Network is needed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        target: str,
+        intermediates: tuple[str, ...] = (),
+        variables: Optional[dict[str, list[str]]] = None,
+    ):
+        self.name = name
+        self.target = target
+        self.intermediates = intermediates
+        self.variables = variables
+
+    def __repr__(self) -> str:
+        return f"ExtractorEntry '{self.name}' of {self.target}"
+
+    def load(self) -> type[ResultsExtractor]:
+        module, cls = self.target.split(":")
+        return getattr(importlib.import_module(module), cls)
+
+
+INTERMEDIATES = {
+    x.name: x
+    for x in [
+        # net load of all investment periods
+        Intermediate(
+            "electrical_load",
+            "_calc_electrical_load",
+            variables={"links": ["carrier", "bus0"], "links_t": ["p0"]},
+        ),
+        Intermediate(
+            "renewable_generation",
+            "_calc_renewable_generation_all",
+            variables={"generators": ["carrier"], "generators_t": ["p"]},
+        ),
+        Intermediate(
+            "net_load_all",
+            "_calc_net_load_all",
+            requires=("electrical_load", "renewable_generation"),
+        ),
+        Intermediate("ramping_all", "_calc_ramping_all", requires=("net_load_all",)),
+        Intermediate(
+            "daily_max_ramp_all",
+            "_calc_daily_max_ramp_all",
+            requires=("ramping_all",),
+        ),
+        # per period or parameter, derived on demand
+        Intermediate("net_load", requires=("net_load_all",)),
+        Intermediate("net_load_sorted", requires=("net_load",)),
+        Intermediate("net_load_peaks", requires=("net_load_all",)),
+        Intermediate("ramping", requires=("ramping_all",)),
+        Intermediate("daily_max_ramp", requires=("daily_max_ramp_all",)),
+        Intermediate("daily_ramp_peaks", requires=("daily_max_ramp_all",)),
+        Intermediate("carrier_aggregator"),
+        # owned by an extractor
+        Intermediate(
+            "shed_seasons",
+            "_calc_seasons",
+            owner="shed_season",
+            requires=("net_load_peaks",),
+        ),
+        Intermediate(
+            "shift_seasons",
+            "_calc_seasons",
+            owner="shift_season",
+            requires=("daily_ramp_peaks",),
+        ),
+        Intermediate(
+            "demand_response",
+            "_calc_demand_response",
+            owner="dr",
+            requires=("carrier_aggregator",),
+            variables={"stores": ["carrier"], "stores_t": ["e"]},
+        ),
+        Intermediate(
+            "marginal_price_by_carrier",
+            "_calc_marginal_cost",
+            owner="cost",
+            requires=("carrier_aggregator",),
+            variables={"buses": ["carrier"], "buses_t": ["marginal_price"]},
+        ),
+    ]
+}
+
+EXTRACTORS = {
+    x.name: x
+    for x in [
+        # dr specific metrics
+        ExtractorEntry(
+            "peakiness",
+            "pypsadr.peakiness:Peakiness",
+            ("net_load_peaks", "net_load_sorted"),
+            {},
+        ),
+        ExtractorEntry(
+            "ramping",
+            "pypsadr.ramping:Ramping",
+            ("daily_ramp_peaks", "daily_max_ramp"),
+            {},
+        ),
+        ExtractorEntry(
+            "shed_season",
+            "pypsadr.shed_season:ShedSeason",
+            ("net_load_peaks", "net_load", "shed_seasons"),
+            {},
+        ),
+        ExtractorEntry(
+            "shed_days",
+            "pypsadr.shed_days:ShedDays",
+            ("net_load_peaks", "net_load", "shed_seasons"),
+            {},
+        ),
+        ExtractorEntry(
+            "shift_season",
+            "pypsadr.shift_season:ShiftSeason",
+            ("daily_ramp_peaks", "daily_max_ramp", "shift_seasons"),
+            {},
+        ),
+        # esm metrics
+        ExtractorEntry(
+            "generation",
+            "pypsadr.generation:Generation",
+            ("carrier_aggregator",),
+            {
+                "generators": ["carrier"],
+                "generators_t": ["p"],
+                "links": ["carrier"],
+                "links_t": ["p1"],
+            },
+        ),
+        ExtractorEntry(
+            "capacity",
+            "pypsadr.capacity:Capacity",
+            (),
+            {
+                "generators": ["carrier", "p_nom", "p_nom_opt"],
+                "links": ["carrier", "p_nom", "p_nom_opt"],
+                "storage_units": ["carrier", "p_nom", "p_nom_opt", "max_hours"],
+            },
+        ),
+        ExtractorEntry(
+            "cost",
+            "pypsadr.cost:Cost",
+            ("marginal_price_by_carrier",),
+            {
+                "stores": ["carrier", "marginal_cost_storage"],
+                "stores_t": ["e"],
+                "generators": [
+                    "carrier",
+                    "p_nom_opt",
+                    "capital_cost",
+                    "marginal_cost",
+                    "build_year",
+                    "lifetime",
+                ],
+                "generators_t": ["p", "marginal_cost"],
+                "links": [
+                    "carrier",
+                    "p_nom_opt",
+                    "capital_cost",
+                    "marginal_cost",
+                    "build_year",
+                    "lifetime",
+                ],
+                "links_t": ["p0", "marginal_cost"],
+            },
+        ),
+        ExtractorEntry(
+            "dr", "pypsadr.demand_response:DemandResponse", ("demand_response",), {}
+        ),
+        ExtractorEntry(
+            "emissions",
+            "pypsadr.emissions:Emissions",
+            (),
+            {"stores": ["carrier"], "stores_t": ["e"]},
+        ),
+        ExtractorEntry("net_load", "pypsadr.net_load:NetLoad", ("net_load",), {}),
+    ]
+}
+
+
+def get_entry(result: str) -> ExtractorEntry:
+    if result not in EXTRACTORS:
+        raise ValueError(
+            f"{result} is not valid. Accepted inputs are {list(EXTRACTORS)}"
+        )
+    return EXTRACTORS[result]
+
+
+def get_extractor_class(result: str) -> type[ResultsExtractor]:
+    return get_entry(result).load()
+
+
+def get_intermediates(results: list[str]) -> list[str]:
+    """Gets intermediates consumed by the results, directly or not, in
+    dependency order"""
+
+    needed = set()
+    stack = [x for result in results for x in get_entry(result).intermediates]
+    while stack:
+        name = stack.pop()
+        if name not in needed:
+            needed.add(name)
+            stack.extend(INTERMEDIATES[name].requires)
+
+    return [x for x in _get_order() if x in needed]
+
+
+def get_variables(results: list[str]) -> Optional[dict[str, set[str]]]:
+    """Gets network variables read by the results and their intermediates
+
+    Returns None if any result needs a full pypsa.Network.
+    """
+
+    variables = {}
+    for result in results:
+        entry = get_entry(result)
+        if entry.variables is None:
+            logger.info(f"{entry.target} requires a full network")
+            return None
+        for component, attrs in entry.variables.items():
+            variables.setdefault(component, set()).update(attrs)
+
+    for name in get_intermediates(results):
+        for component, attrs in INTERMEDIATES[name].variables.items():
+            variables.setdefault(component, set()).update(attrs)
+
+    return variables
+
+
+def get_schedule(results: list[str]) -> list[tuple[str, str]]:
+    """Gets the steps to extract the results as (action, name)
+
+    Results sharing intermediates (directly or through other results) are
+    extracted one after another, otherwise in registry order. Each
+    intermediate with a method is computed just before the first result
+    consuming it, and every intermediate is released after the last.
+    """
+
+    results = [x for x in EXTRACTORS if x in set(results)]
+    closures = {x: get_intermediates([x]) for x in results}
+
+    # group results with overlapping closures, in order of first member
+    groups = []
+    for result in results:
+        shared = [x for x in groups if x[1] & set(closures[result])]
+        merged = ([result], set(closures[result]))
+        for group in shared:
+            merged = (group[0] + merged[0], group[1] | merged[1])
+            groups.remove(group)
+        groups.append(merged)
+    order = {x: i for i, x in enumerate(results)}
+    groups.sort(key=lambda x: min(order[y] for y in x[0]))
+    results = [y for x in groups for y in sorted(x[0], key=order.get)]
+
+    last = {}
+    for result in results:
+        for name in closures[result]:
+            last[name] = result
+
+    steps = []
+    computed = set()
+    for result in results:
+        for name in closures[result]:
+            if name not in computed and INTERMEDIATES[name].method:
+                steps.append((COMPUTE, name))
+            computed.add(name)
+        steps.append((EXTRACT, result))
+        steps.extend((RELEASE, x) for x in closures[result] if last[x] == result)
+    return steps
+
+
+def compute_intermediate(
+    name: str,
+    n: pypsa.Network | NetworkData,
+    year: Optional[int],
+    cache: ResultsCache,
+    extractor: Optional[ResultsExtractor] = None,
+    periods: Optional[tuple[int, ...]] = None,
+) -> Any:
+    """Computes an intermediate with the method of its owner, over the periods
+    (default the year only)
+
+    The given extractor is used if it is an instance of the owner (any
+    extractor, if the owner is the base extractor), otherwise the owner is
+    created on the same network, cache and periods.
+    """
+
+    spec = INTERMEDIATES[name]
+    if spec.method is None:
+        raise ValueError(f"Intermediate {name} is derived on demand by consumers")
+
+    from .extractor import IntermediateExtractor, ResultsExtractor
+
+    if extractor is not None:
+        periods = extractor.periods
+
+    if spec.owner is None:
+        if not isinstance(extractor, ResultsExtractor):
+            extractor = IntermediateExtractor(n, year, cache, periods)
+    else:
+        owner = get_extractor_class(spec.owner)
+        if not isinstance(extractor, owner):
+            extractor = owner(n, year, cache, periods)
+
+    logger.debug(f"Computing intermediate {name} with {type(extractor).__name__}")
+    return getattr(extractor, spec.method)()
+
+
+def _get_order() -> list[str]:
+    graph = {x: spec.requires for x, spec in INTERMEDIATES.items()}
+    return list(TopologicalSorter(graph).static_order())
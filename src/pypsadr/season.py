@@ -0,0 +1,83 @@
+"""Season finding shared by the shed and shift season extractors
+
+A season is found from the top events (net load hours or ramping days). Events
+are put in chronological order and the season is trimmed from both ends,
+always dropping the end event with the larger gap to its following event,
+until only the requested number of events remain.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def get_time_between_events(
+    events: pd.DataFrame,
+    n_events: int,
+    on: str = "timestep",
+    by: Optional[str] = None,
+) -> pd.DataFrame:
+    """Gets the gap from each of the top events to the following event
+
+    Events must be ordered by rank. One extra event past n_events is used as
+    the end point of the last gap and dropped from the output. If by is given,
+    events are ranked and gaps taken within each group (ie. period).
+    """
+
+    if by is None:
+        top = events.iloc[: n_events + 1].sort_values(on).reset_index(drop=True)
+        top["diff"] = top[on].diff().shift(-1)
+        return top.iloc[:n_events].copy()
+
+    rank = events.groupby(by, sort=False).cumcount()
+    top = events[rank <= n_events].sort_values([by, on]).reset_index(drop=True)
+    top["diff"] = top.groupby(by, sort=False)[on].shift(-1) - top[on]
+    rank = top.groupby(by, sort=False).cumcount()
+    return top[rank < n_events].reset_index(drop=True)
+
+
+def get_season_bounds(gaps: np.ndarray, size: int) -> tuple[int, int]:
+    """Gets [start, stop) rows of the season within chronological events
+
+    Gaps are the time from each event to the next one. Runs as a single
+    two-pointer pass, so cost is linear in the number of events.
+
+    With no more than n_events events (see get_time_between_events), the last
+    has no following event and its gap is NaT. Trailing NaT gaps are dropped
+    before trimming, so the season only holds events with a known gap.
+    """
+
+    gaps = np.asarray(gaps).astype("timedelta64[ns]")
+    stop = len(gaps)
+    while stop and np.isnat(gaps[stop - 1]):
+        stop -= 1
+    if np.isnat(gaps[:stop]).any():
+        raise ValueError("Gaps between events can only be missing for the last")
+
+    gaps = np.abs(gaps[:stop].astype(np.int64))
+    gaps = gaps.tolist()  # python ints are faster to compare one at a time
+
+    start = 0
+    while stop - start > size:
+        if gaps[start] > gaps[stop - 1]:
+            start += 1
+        else:
+            stop -= 1
+
+    return start, stop
+
+
+def get_seasons(times: pd.DataFrame, size: int, by: str = "period") -> pd.DataFrame:
+    """Gets the season of each group from get_time_between_events(by=by)"""
+
+    seasons = []
+    for _, df in times.groupby(by, sort=False):
+        start, stop = get_season_bounds(df["diff"].to_numpy(), size)
+        seasons.append(df.iloc[start:stop])
+    return pd.concat(seasons).reset_index(drop=True)
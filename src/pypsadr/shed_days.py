@@ -1,30 +1,30 @@
 from __future__ import annotations
 
 import pandas as pd
-import matplotlib.pyplot as plt
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 from datetime import datetime
 
 from .extractor import ResultsExtractor
+from .plotting import MAX_POINTS, plot_decimated
 from .shed_season import ShedSeason
 
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class ShedDays(ResultsExtractor):
-    """Shed Days just builds on ShedSeason"""
+    """Shed Days just builds on the shed seasons of ShedSeason"""
 
-    def __init__(self, n, year=None):
-        super().__init__(n, year)
-        self.net_load = self.get_net_load(sorted=True)
-        self.shead_season = ShedSeason(n, year)
+    def __init__(self, n, year=None, cache=None, periods=None):
+        super().__init__(n, year, cache, periods)
+        self.net_load = self.get_net_load_peaks(ShedSeason.TOP_N + 1)
 
     def extract_dataframe(self) -> pd.DataFrame:
-        shed_season = (
-            self.shead_season.extract_datapoint()
-        )  # type tuple[datetime, datetime]
+        shed_season = self._get_shed_season()
         days_in_top_100 = self._get_days_in_top_100()
         return self._date_in_season(shed_season, days_in_top_100).set_index("timestep")
 
@@ -42,6 +42,12 @@ class ShedDays(ResultsExtractor):
         else:
             return days
 
+    def _get_shed_season(self) -> tuple[datetime, datetime]:
+        """Gets first and last hour of the shed season"""
+        timesteps = self._select_period(self.get_intermediate("shed_seasons"))
+        timesteps = timesteps["timestep"]
+        return (timesteps.iat[0].to_pydatetime(), timesteps.iat[-1].to_pydatetime())
+
     def _get_days_in_top_100(self) -> pd.DataFrame:
         """Gets days in top 100 most likley days"""
         top_days = self.net_load.set_index("timestep").copy()
@@ -67,6 +73,8 @@ class ShedDays(ResultsExtractor):
         return shed_days
 
     def plot(self, save: Optional[str] = None, **kwargs) -> tuple[plt.figure, plt.axes]:
+        import matplotlib.pyplot as plt
+
         fontsize = kwargs.get("fontsize", 12)
         figsize = kwargs.get("figsize", (20, 6))
 
@@ -81,21 +89,23 @@ class ShedDays(ResultsExtractor):
             ["Net_Load_MW", "Top 100 Net Load Hours"]
         ].rename(columns={"Net_Load_MW": "Net Load"})
 
-        dates = self.shead_season.extract_datapoint()
+        dates = self._get_shed_season()
         start_date = dates[0]
         end_date = dates[1]
 
         shed_days = self.net_load.iloc[0:99]
         num_shed_days = len(self.extract_datapoint())
-        points_to_plot = [
-            (x, y)
-            for x, y in zip(
-                shed_days["timestep"].to_list(), shed_days["Net_Load_MW"].to_list()
-            )
-        ]
 
         fig, ax = plt.subplots(figsize=figsize)
-        df.plot(ax=ax, xlabel="", color=["tab:blue", "tab:red"])
+        plot_decimated(
+            df,
+            ax,
+            kwargs.get("max_points", MAX_POINTS),
+            by="Net Load",
+            keep=net_load_sorted["timestep"].iloc[:100],
+            xlabel="",
+            color=["tab:blue", "tab:red"],
+        )
         ax.set_ylabel("Net Load (MW)", fontsize=fontsize)
         ax.margins(x=0.01)
         ax.legend(fontsize=fontsize)
@@ -131,8 +141,9 @@ class ShedDays(ResultsExtractor):
         ax.axvline(x=start_date, color="k", linestyle="-", linewidth=3)
         ax.axvline(x=end_date, color="k", linestyle="-", linewidth=3)
 
-        for point_x, point_y in points_to_plot:
-            ax.scatter(point_x, point_y, color="k", s=5, zorder=9)
+        ax.scatter(
+            shed_days["timestep"], shed_days["Net_Load_MW"], color="k", s=5, zorder=9
+        )
 
         if save:
             fig.savefig(save, dpi=400, bbox_inches="tight")
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import pandas as pd
-import matplotlib.pyplot as plt
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 from datetime import datetime
 
 from .extractor import ResultsExtractor
+from .plotting import MAX_POINTS, plot_decimated
+from .season import get_seasons, get_time_between_events
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
 
 import logging
 
@@ -13,14 +17,22 @@ logger = logging.getLogger(__name__)
 
 
 class ShedSeason(ResultsExtractor):
-    def __init__(self, n, year=None):
-        super().__init__(n, year)
-        self.net_load = self.get_net_load(sorted=True)
+    TOP_N = 100  # number of net load hours considered
+    SEASON_SIZE = 81  # number of those hours kept in the season
+
+    def __init__(self, n, year=None, cache=None, periods=None):
+        super().__init__(n, year, cache, periods)
+        self.net_load = self.get_net_load_peaks(self.TOP_N + 1)
 
     def extract_dataframe(self) -> pd.DataFrame:
-        df = self.net_load.copy()
+        seasons = self.get_intermediate("shed_seasons")
+        return self._select_period(seasons).set_index("timestep")
+
+    def _calc_seasons(self) -> pd.DataFrame:
+        """Gets the shed season of every investment period"""
+        df = self.get_net_load_peaks_by_period(self.TOP_N + 1)
         df = self._time_between_peaks(df)
-        return self._get_season(df).set_index("timestep")
+        return self._get_season(df)
 
     def extract_datapoint(
         self, as_df: Optional[bool] = False
@@ -41,48 +53,25 @@ class ShedSeason(ResultsExtractor):
         else:
             return (first_day, last_day)
 
-    @staticmethod
-    def _time_between_peaks(net_load: pd.DataFrame) -> pd.DataFrame:
-        """Gets time between top 100 loads"""
-
-        df = net_load.copy()
-
-        df_times = df.iloc[:101, :].copy()  # keep end point
-        df_times = df_times.sort_values("timestep").reset_index(drop=True)
-
-        diff = []
-        for row in range(len(df_times)):
-            try:
-                start = df_times.loc[row, "timestep"]
-                end = df_times.loc[row + 1, "timestep"]
-                diff.append(end - start)
-            except KeyError:
-                pass
-        df_times = df_times.iloc[:100, :]  # remove end point
-        df_times["diff"] = diff
-
-        df_times["Top 100 Net-Load Hours"] = net_load.at[99, "Net_Load_MW"]
+    @classmethod
+    def _time_between_peaks(cls, net_load: pd.DataFrame) -> pd.DataFrame:
+        """Gets time between top 100 loads of each period"""
 
+        df_times = get_time_between_events(net_load, cls.TOP_N, by="period")
+        rank = net_load.groupby("period", sort=False).cumcount()
+        routine = net_load[rank == cls.TOP_N - 1].set_index("period")["Net_Load_MW"]
+        df_times[f"Top {cls.TOP_N} Net-Load Hours"] = df_times["period"].map(routine)
         return df_times
 
-    @staticmethod
-    def _get_season(df_times: pd.DataFrame) -> pd.DataFrame:
-        """Gets chortest span containing at least 80 days"""
-
-        load_shortest = df_times.copy()
-
-        while len(load_shortest) > 81:
-            start_diff = abs(load_shortest["diff"].iloc[0])
-            end_diff = abs(load_shortest["diff"].iloc[-1])
-            if start_diff > end_diff:
-                load_shortest = load_shortest.iloc[1:, :]
-            else:
-                load_shortest = load_shortest.iloc[:-1, :]
-            load_shortest = load_shortest.reset_index(drop=True)
+    @classmethod
+    def _get_season(cls, df_times: pd.DataFrame) -> pd.DataFrame:
+        """Gets chortest span containing at least 80 days in each period"""
 
-        return load_shortest
+        return get_seasons(df_times, cls.SEASON_SIZE, by="period")
 
     def plot(self, save: Optional[str] = None, **kwargs) -> tuple[plt.figure, plt.axes]:
+        import matplotlib.pyplot as plt
+
         fontsize = kwargs.get("fontsize", 12)
         figsize = kwargs.get("figsize", (20, 6))
 
@@ -99,7 +88,15 @@ class ShedSeason(ResultsExtractor):
         dates = self.extract_datapoint()
 
         fig, ax = plt.subplots(figsize=figsize)
-        df.plot(ax=ax, xlabel="", color=["tab:blue", "tab:red"])
+        plot_decimated(
+            df,
+            ax,
+            kwargs.get("max_points", MAX_POINTS),
+            by="Net Load",
+            keep=net_load_sorted["timestep"].iloc[:100],
+            xlabel="",
+            color=["tab:blue", "tab:red"],
+        )
         ax.set_ylabel("Net Load (MW)", fontsize=fontsize)
         ax.margins(x=0.01)
         ax.legend(fontsize=fontsize)
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import pandas as pd
-import matplotlib.pyplot as plt
 from typing import Optional
 from datetime import datetime
 from .extractor import ResultsExtractor
+from .plotting import MAX_POINTS, plot_decimated
+from .season import get_seasons, get_time_between_events
 
 import logging
 
@@ -12,14 +13,22 @@ logger = logging.getLogger(__name__)
 
 
 class ShiftSeason(ResultsExtractor):
-    def __init__(self, n, year=None):
-        super().__init__(n, year)
-        self.ramp_ts = self.get_daily_max_ramp()
+    TOP_N = 25  # number of ramping days considered
+    SEASON_SIZE = 21  # number of those days kept in the season
+
+    def __init__(self, n, year=None, cache=None, periods=None):
+        super().__init__(n, year, cache, periods)
+        self.ramp_ts = self.get_daily_ramp_peaks(self.TOP_N + 1)
 
     def extract_dataframe(self) -> pd.DataFrame:
-        df = self.ramp_ts.copy()
+        seasons = self.get_intermediate("shift_seasons")
+        return self._select_period(seasons).set_index("timestep")
+
+    def _calc_seasons(self) -> pd.DataFrame:
+        """Gets the shift season of every investment period"""
+        df = self.get_daily_ramp_peaks_by_period(self.TOP_N + 1)
         df = self._time_between_peaks(df)
-        return self._get_season(df).set_index("timestep")
+        return self._get_season(df)
 
     def extract_datapoint(
         self, as_df: Optional[bool] = False
@@ -40,49 +49,28 @@ class ShiftSeason(ResultsExtractor):
         else:
             return (first_day, last_day)
 
-    @staticmethod
-    def _time_between_peaks(daily_ramp: pd.DataFrame) -> pd.DataFrame:
-        """Gets time between top 25 loads"""
-
-        shift_25 = daily_ramp.copy()
-        shift_25 = shift_25.sort_values(
-            "Absolute 3-hr Ramping", ascending=False
-        ).reset_index(drop=True)
-        shift_25 = shift_25.iloc[:26, :]
-        shift_25 = shift_25.sort_values("timestep").reset_index(drop=True)
-        diff = []
-        for row in range(len(shift_25)):
-            try:
-                start = shift_25.loc[row, "timestep"]
-                end = shift_25.loc[row + 1, "timestep"]
-                diff.append(end - start)
-            except KeyError:
-                pass
-        shift_25 = shift_25.iloc[:25]
-        shift_25["diff"] = diff
-        return shift_25.reset_index(drop=True)
-
-    @staticmethod
-    def _get_season(df_times: pd.DataFrame) -> pd.DataFrame:
-        """Gets shortest span containing at least 20 days"""
-
-        shift_season = df_times.copy()
-        while len(shift_season) > 21:
-            start_diff = abs(shift_season["diff"].iloc[0])
-            end_diff = abs(shift_season["diff"].iloc[-1])
-            if start_diff > end_diff:
-                shift_season = shift_season.iloc[1:, :]
-            else:
-                shift_season = shift_season.iloc[:-1, :]
-            shift_season = shift_season.reset_index(drop=True)
-
-        return shift_season
+    @classmethod
+    def _time_between_peaks(cls, daily_ramp: pd.DataFrame) -> pd.DataFrame:
+        """Gets time between top 25 loads of each period
+
+        Daily ramps must already be in descending order within each period.
+        """
+
+        return get_time_between_events(daily_ramp, cls.TOP_N, by="period")
+
+    @classmethod
+    def _get_season(cls, df_times: pd.DataFrame) -> pd.DataFrame:
+        """Gets shortest span containing at least 20 days in each period"""
+
+        return get_seasons(df_times, cls.SEASON_SIZE, by="period")
 
     def plot(self, save: Optional[str] = None, **kwargs):
+        import matplotlib.pyplot as plt
+
         fontsize = kwargs.get("fontsize", 12)
         figsize = kwargs.get("figsize", (20, 6))
 
-        ramping = self.ramp_ts.sort_values("timestep", ascending=False).copy()
+        ramping = self.get_daily_max_ramp().sort_values("timestep", ascending=False)
         ramping_sorted = self.ramp_ts
 
         # peak = ramping_sorted.at[0, "Absolute 3-hr Ramping"]
@@ -97,17 +85,16 @@ class ShiftSeason(ResultsExtractor):
         mid_date = start_date + ((end_date - start_date) / 2)
 
         top_25 = ramping_sorted.iloc[:25]
-        points_to_plot = [
-            (x, y)
-            for x, y in zip(
-                top_25["timestep"].to_list(),
-                top_25["Absolute 3-hr Ramping"].to_list(),
-            )
-        ]
 
         fig, ax = plt.subplots(figsize=figsize)
-        ramping.set_index("timestep").plot(
-            ax=ax, xlabel="", color=["tab:blue", "tab:red"]
+        plot_decimated(
+            ramping.set_index("timestep"),
+            ax,
+            kwargs.get("max_points", MAX_POINTS),
+            by="Absolute 3-hr Ramping",
+            keep=top_25["timestep"],
+            xlabel="",
+            color=["tab:blue", "tab:red"],
         )
 
         ax.set_ylabel("Daily 3hr Absolute Net Load Ramping (MW)", fontsize=fontsize)
@@ -131,8 +118,13 @@ class ShiftSeason(ResultsExtractor):
         ax.axvline(x=start_date, color="k", linestyle="-", linewidth=3)
         ax.axvline(x=end_date, color="k", linestyle="-", linewidth=3)
 
-        for point_x, point_y in points_to_plot:
-            ax.scatter(point_x, point_y, color="k", s=5, zorder=9)
+        ax.scatter(
+            top_25["timestep"],
+            top_25["Absolute 3-hr Ramping"],
+            color="k",
+            s=5,
+            zorder=9,
+        )
 
         if save:
             fig.savefig(save, dpi=400, bbox_inches="tight")
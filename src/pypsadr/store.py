@@ -0,0 +1,314 @@
+"""Partitioned columnar store of extracted results
+
+Datapoints and dataframes of many runs are kept in two Parquet datasets
+rather than one CSV per result per run:
+
+    <root>/datapoint/<partition>=<value>/<name>/<result>.parquet
+    <root>/dataframe/<partition>=<value>/<name>/<result>.parquet
+
+Each file holds one result of one run in long format, with the run keys
+(scenario, sector, etc.) as columns, so writing a result never rewrites the
+others. Values are split into typed columns (float, timestamp, duration and
+string), so no parsing is needed on read. Queries filter on keys with
+pushdown, so only the matching partitions and files are read.
+"""
+
+from __future__ import annotations
+
+import datetime
+import numbers
+import os
+import pandas as pd
+from pathlib import Path
+from typing import Any, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+DATAPOINT = "datapoint"
+DATAFRAME = "dataframe"
+
+# bumped whenever the layout or schema of stored results changes, so results
+# recorded by manifests (see pypsadr.manifest) of another version are rewritten
+STORE_VERSION = 2
+
+VALUE_COLUMNS = ["value", "value_time", "value_delta", "value_str"]
+
+
+def get_schema(kind: str, keys: list[str]) -> pa.Schema:
+    """Gets the schema of a dataset, keys excluding partition keys"""
+    import pyarrow as pa
+
+    fields = [(x, pa.string()) for x in keys] + [("result", pa.string())]
+
+    if kind == DATAPOINT:
+        fields += [("metric", pa.string())]
+    elif kind == DATAFRAME:
+        fields += [
+            ("row", pa.int32()),
+            ("index_name", pa.string()),
+            ("index_time", pa.timestamp("us")),
+            ("index_str", pa.string()),
+            ("column", pa.string()),
+        ]
+    else:
+        raise ValueError(f"Kind must be '{DATAPOINT}' or '{DATAFRAME}'; got {kind}")
+
+    fields += [
+        ("value", pa.float64()),
+        ("value_time", pa.timestamp("us")),
+        ("value_delta", pa.duration("us")),
+        ("value_str", pa.string()),
+    ]
+    return pa.schema(fields)
+
+
+def datapoint_to_long(dp: pd.DataFrame) -> pd.DataFrame:
+    """Converts a (metric, value) datapoint to typed rows"""
+
+    df = pd.DataFrame({"metric": dp.iloc[:, 0].astype(str).to_numpy()})
+    for col, values in _to_typed(dp["value"]).items():
+        df[col] = values.to_numpy()
+    return df
+
+
+def dataframe_to_long(df: pd.DataFrame) -> pd.DataFrame:
+    """Converts a wide dataframe to typed rows, one per cell
+
+    Leading levels of a MultiIndex (ie. period) are stored as columns.
+    """
+
+    if isinstance(df.index, pd.MultiIndex):
+        df = df.reset_index(level=list(range(df.index.nlevels - 1)))
+
+    n_rows = len(df)
+
+    index = pd.DataFrame({"row": range(n_rows)})
+    index["index_name"] = df.index.name
+    if isinstance(df.index, pd.DatetimeIndex):
+        index["index_time"] = df.index.to_numpy()
+        index["index_str"] = None
+    elif isinstance(df.index, pd.RangeIndex):
+        # default index is rebuilt from the row number
+        index["index_time"] = pd.NaT
+        index["index_str"] = None
+    else:
+        index["index_time"] = pd.NaT
+        index["index_str"] = df.index.astype(str).to_numpy()
+
+    dfs = []
+    for col in df.columns:
+        long = index.copy()
+        long["column"] = str(col)
+        for typed, values in _to_typed(df[col]).items():
+            long[typed] = values.to_numpy()
+        dfs.append(long)
+
+    if not dfs:
+        return pd.DataFrame(columns=list(index.columns) + ["column"] + VALUE_COLUMNS)
+    return pd.concat(dfs, ignore_index=True)
+
+
+def long_to_datapoint(long: pd.DataFrame) -> pd.DataFrame:
+    """Converts typed rows of one result back to a datapoint indexed on metric"""
+
+    values = coalesce_values(long)
+    return pd.DataFrame({"value": values.to_numpy()}, index=long["metric"].to_numpy())
+
+
+def long_to_dataframe(long: pd.DataFrame) -> pd.DataFrame:
+    """Converts typed rows of one result back to its wide dataframe"""
+
+    long = long.sort_values("row", kind="stable")
+    rows = long.drop_duplicates("row")
+
+    if rows["index_time"].notna().any():
+        index = pd.DatetimeIndex(rows["index_time"].to_numpy())
+    elif rows["index_str"].notna().any():
+        index = pd.Index(rows["index_str"].to_numpy())
+    else:
+        index = pd.RangeIndex(len(rows))
+    name = rows["index_name"].iloc[0] if not rows.empty else None
+    index.name = None if pd.isna(name) else name
+
+    df = pd.DataFrame(index=index)
+    for col, values in long.groupby("column", sort=False):
+        df[col] = coalesce_values(values).to_numpy()
+    return df
+
+
+def write_results(
+    root: str | Path,
+    keys: dict[str, Optional[str]],
+    name: str,
+    datapoints: dict[str, pd.DataFrame],
+    dataframes: dict[str, pd.DataFrame],
+    partition_on: tuple[str, ...] = ("region",),
+) -> None:
+    """Writes results of one run to the store
+
+    Only the given results are written; others stored for the run are left
+    as is. Each file is written atomically, so an interruption never corrupts
+    the store.
+    """
+
+    for kind, results in ((DATAPOINT, datapoints), (DATAFRAME, dataframes)):
+        to_long = datapoint_to_long if kind == DATAPOINT else dataframe_to_long
+
+        for result, df in results.items():
+            long = to_long(df)
+            for key, value in keys.items():
+                if key not in partition_on:
+                    long[key] = value
+            long["result"] = result
+            _write_part(root, kind, keys, name, result, long, partition_on)
+
+
+def get_stored_results(
+    root: str | Path,
+    keys: dict[str, Optional[str]],
+    name: str,
+    partition_on: tuple[str, ...] = ("region",),
+) -> set[str]:
+    """Gets results of one run held in the store, as both datapoints and
+    dataframes
+
+    Only the names of the run's files are listed; none are read.
+    """
+
+    stored = []
+    for kind in (DATAPOINT, DATAFRAME):
+        run_dir = _get_run_dir(root, kind, keys, name, partition_on)
+        stored.append({x.stem for x in run_dir.glob("*.parquet")})
+    return stored[0] & stored[1]
+
+
+def _get_run_dir(
+    root: str | Path,
+    kind: str,
+    keys: dict[str, Optional[str]],
+    name: str,
+    partition_on: tuple[str, ...],
+) -> Path:
+    partitions = [f"{x}={keys[x]}" for x in partition_on]
+    return Path(root, kind, *partitions, name)
+
+
+def _write_part(
+    root: str | Path,
+    kind: str,
+    keys: dict[str, Optional[str]],
+    name: str,
+    result: str,
+    df: pd.DataFrame,
+    partition_on: tuple[str, ...],
+) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = [x for x in keys if x not in partition_on]
+    schema = get_schema(kind, columns)
+
+    run_dir = _get_run_dir(root, kind, keys, name, partition_on)
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    p = Path(run_dir, f"{result}.parquet")
+    # hidden, so datasets never read a partly written file
+    tmp = p.with_name(f".{p.name}.tmp")
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    pq.write_table(table, tmp, row_group_size=max(len(table), 1))
+    os.replace(tmp, p)
+
+
+def read_results(
+    root: str | Path,
+    kind: str,
+    filters: Optional[dict[str, Any]] = None,
+    columns: Optional[list[str]] = None,
+) -> pd.DataFrame:
+    """Reads typed rows matching the filters from the store
+
+    Filters map a key to a value, a list of values or None (matches missing
+    keys, also allowed within a list). Filters are pushed down, so non-matching
+    partitions and files are never read.
+    """
+    import pyarrow.dataset as ds
+
+    path = Path(root, kind)
+    if not path.exists():
+        raise FileNotFoundError(f"No {kind} results stored in {root}")
+
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+
+    expression = None
+    for key, value in (filters or {}).items():
+        field = ds.field(key)
+        if value is None:
+            condition = field.is_null()
+        elif isinstance(value, (list, tuple, set)):
+            values = [x for x in value if x is not None]
+            if not values:
+                condition = field.is_null()
+            elif len(values) < len(value):
+                condition = field.isin(values) | field.is_null()
+            else:
+                condition = field.isin(values)
+        else:
+            condition = field == value
+        expression = condition if expression is None else expression & condition
+
+    return dataset.to_table(filter=expression, columns=columns).to_pandas()
+
+
+def _to_typed(values: pd.Series) -> dict[str, pd.Series]:
+    """Splits values into the typed value columns"""
+
+    n = len(values)
+    typed = {
+        "value": pd.Series([float("nan")] * n, dtype="float64"),
+        "value_time": pd.Series([pd.NaT] * n, dtype="datetime64[us]"),
+        "value_delta": pd.Series([pd.NaT] * n, dtype="timedelta64[us]"),
+        "value_str": pd.Series([None] * n, dtype=object),
+    }
+
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+        typed["value"] = values.astype("float64").reset_index(drop=True)
+    elif pd.api.types.is_datetime64_any_dtype(values):
+        typed["value_time"] = values.astype("datetime64[us]").reset_index(drop=True)
+    elif pd.api.types.is_timedelta64_dtype(values):
+        typed["value_delta"] = values.astype("timedelta64[us]").reset_index(drop=True)
+    else:
+        # mixed objects are typed one at a time
+        for i, x in enumerate(values.tolist()):
+            if x is None or (isinstance(x, float) and pd.isna(x)):
+                continue
+            elif isinstance(x, numbers.Number) and not isinstance(x, complex):
+                typed["value"].iat[i] = float(x)
+            elif isinstance(x, (datetime.date, datetime.datetime)):
+                typed["value_time"].iat[i] = pd.Timestamp(x)
+            elif isinstance(x, datetime.timedelta):
+                typed["value_delta"].iat[i] = pd.Timedelta(x)
+            else:
+                typed["value_str"].iat[i] = str(x)
+
+    return typed
+
+
+def coalesce_values(long: pd.DataFrame) -> pd.Series:
+    """Coalesces typed value columns to one, keeping the type of each value"""
+
+    present = [x for x in VALUE_COLUMNS if long[x].notna().any()]
+    if not present:
+        return pd.Series(float("nan"), index=long.index)
+    if len(present) == 1:
+        return long[present[0]]
+
+    values = pd.Series(None, index=long.index, dtype=object)
+    for col in present:
+        mask = long[col].notna()
+        values[mask] = long.loc[mask, col].astype(object)
+    return values
@@ -0,0 +1,33 @@
+import matplotlib
+import matplotlib.pyplot as plt
+import pytest
+
+from pypsadr import ResultsAccessor
+from pypsadr.loader import NetworkData
+from synthetic import make_network
+
+matplotlib.use("Agg")
+
+
+@pytest.fixture(scope="module")
+def network() -> NetworkData:
+    return make_network(snapshots=24 * 14)
+
+
+def test_datapoint(network):
+    df = ResultsAccessor(network).get_datapoint("generation")
+
+    assert df.columns.to_list() == ["metric", "value"]
+    assert {"Solar", "Wind", "Natural Gas CCGT"} <= set(df["metric"])
+
+
+def test_dataframe_carriers(network):
+    df = ResultsAccessor(network).get_dataframe("generation")
+
+    assert df.columns.name is None
+    assert df.index.equals(network.snapshots)
+
+
+def test_plot(network):
+    fig, _ = ResultsAccessor(network).plot("generation")
+    plt.close(fig)
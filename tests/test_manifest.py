@@ -0,0 +1,55 @@
+import pandas as pd
+
+from pypsadr.manifest import (
+    add_result,
+    get_stale_results,
+    read_manifest,
+    start_manifest,
+    write_manifest,
+)
+from pypsadr.store import get_stored_results, write_results
+
+RESULTS = ["peakiness", "cost"]
+
+
+def test_stale_results(tmp_path):
+    network = tmp_path / "n.nc"
+    network.write_bytes(b"network")
+
+    start_manifest(tmp_path, network)
+    add_result(tmp_path, "peakiness")
+
+    assert get_stale_results(tmp_path, network, RESULTS) == ["cost"]
+    assert get_stale_results(tmp_path, network, RESULTS, "plots") == RESULTS
+
+
+def test_stale_results_of_another_store_version(tmp_path):
+    network = tmp_path / "n.nc"
+    network.write_bytes(b"network")
+
+    start_manifest(tmp_path, network)
+    for result in RESULTS:
+        add_result(tmp_path, result)
+        add_result(tmp_path, result, "plots")
+
+    # ie. written before the store was versioned
+    manifest = read_manifest(tmp_path)
+    del manifest["store_version"]
+    write_manifest(tmp_path, manifest)
+
+    assert get_stale_results(tmp_path, network, RESULTS) == RESULTS
+    assert get_stale_results(tmp_path, network, RESULTS, "plots") == []
+
+
+def test_stored_results(tmp_path):
+    keys = {"region": "caiso", "scenario": "static"}
+    dp = pd.DataFrame({"metric": ["a"], "value": [1.0]})
+    df = pd.DataFrame({"x": [1.0, 2.0]})
+
+    assert get_stored_results(tmp_path, keys, "run") == set()
+
+    write_results(tmp_path, keys, "run", {"peakiness": dp}, {"peakiness": df})
+    write_results(tmp_path, keys, "run", {"cost": dp}, {})
+
+    # only held as a datapoint
+    assert get_stored_results(tmp_path, keys, "run") == {"peakiness"}
@@ -0,0 +1,38 @@
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+from pypsadr import ResultsAccessor
+from pypsadr.plotting import decimate
+from synthetic import make_network
+
+matplotlib.use("Agg")
+
+
+def test_decimate_keeps_peaks_and_given_points():
+    index = pd.date_range("2030-01-01", periods=8760, freq="h")
+    series = pd.Series(np.random.default_rng(0).normal(size=8760), index=index)
+
+    decimated = decimate(series, 500, keep=[index[1234]])
+
+    assert len(decimated) < 520
+    assert decimated.index.is_monotonic_increasing
+    for label in (series.idxmax(), series.idxmin(), index[0], index[-1], index[1234]):
+        assert label in decimated.index
+
+
+def test_decimate_short_series():
+    series = pd.Series(range(10))
+    assert decimate(series, 500) is series
+    assert decimate(series, None) is series
+
+
+@pytest.mark.parametrize("result", ["shed_days", "shift_season"])
+def test_top_events_scattered_at_once(result):
+    ra = ResultsAccessor(make_network(snapshots=8760))
+    fig, ax = ra.plot(result)
+
+    assert len(ax.collections) == 1
+    plt.close(fig)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pypsadr.season import get_season_bounds, get_seasons, get_time_between_events
+
+
+def _events(hours: list[int], period: int = 2030) -> pd.DataFrame:
+    """Events ranked in the given order, at hours of the year"""
+    return pd.DataFrame(
+        {
+            "period": period,
+            "timestep": pd.Timestamp(f"{period}-01-01") + pd.to_timedelta(hours, "h"),
+        }
+    )
+
+
+def test_season_bounds_trims_larger_gap():
+    gaps = np.array([10, 1, 1, 1, 5], dtype="timedelta64[h]")
+    assert get_season_bounds(gaps, 3) == (1, 4)
+
+
+def test_season_bounds_short_event_list():
+    # fewer than n_events + 1 events, so the last has no following event
+    times = get_time_between_events(_events([0, 50, 1, 2]), n_events=10)
+    assert times["diff"].isna().to_list() == [False, False, False, True]
+
+    start, stop = get_season_bounds(times["diff"].to_numpy(), 2)
+    assert (start, stop) == (0, 2)
+
+    # fewer events than the season size keeps every event with a gap
+    assert get_season_bounds(times["diff"].to_numpy(), 10) == (0, 3)
+
+
+def test_season_bounds_missing_inner_gap():
+    gaps = np.array([1, "NaT", 1], dtype="timedelta64[h]")
+    with pytest.raises(ValueError):
+        get_season_bounds(gaps, 2)
+
+
+def test_seasons_short_event_list_by_period():
+    events = pd.concat([_events([0, 1, 2, 3, 40], 2030), _events([5, 6], 2035)])
+    times = get_time_between_events(events, n_events=10, by="period")
+    seasons = get_seasons(times, 3)
+
+    assert seasons.groupby("period").size().to_dict() == {2030: 3, 2035: 1}
+    assert seasons["diff"].notna().all()